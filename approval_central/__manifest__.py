@@ -16,9 +16,12 @@
         'views/approval_condition_views.xml',
         'data/dashboard_approval_view.sql',
         'data/approval_actions.xml',
+        'data/ir_cron.xml',
         'views/approval_dashboard_views.xml',
         'views/approval_request_views.xml',
         'views/approval_history_views.xml',
+        'views/approval_archive_views.xml',
+        'views/approval_transition_sample_views.xml',
         'security/approval_group_category.xml',
         'views/approval_actions.xml',
         'views/approval_delegate.xml',
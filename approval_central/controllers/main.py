@@ -1,29 +1,79 @@
-from odoo import http
+import json
+
+from odoo import api, fields, http
 from odoo.http import request
+from werkzeug.exceptions import BadRequest
 
 class ApprovalAPI(http.Controller):
 
     @http.route('/api/approve', type='json', auth='user')
-    def approve(self, model_name, record_id, action, remark=None):
-        approval = request.env['approval.request'].sudo().search([
-            ('model_name', '=', model_name),
-            ('record_id', '=', record_id)
-        ], limit=1)
-        if not approval:
-            return {'error': 'Request not found'}
-
-        if approval.status != 'pending':
-            return {'error': 'Already processed'}
-
-        # simulate approval logic (check roles, step etc.)
-        approval.write({
-            'status': 'approved' if action == 'approve' else 'rejected'
-        })
-        request.env['approval.action.log'].sudo().create({
-            'request_id': approval.id,
-            'action': action,
-            'user_id': request.env.uid,
-            'remark': remark,
-            'step_number': approval.current_step
-        })
-        return {'success': True, 'new_status': approval.status}
+    def approve(self, decisions=None, model_name=None, record_id=None, action=None, remark=None):
+        """Apply approval decisions through the workflow engine.
+
+        ``decisions`` is a list of ``{request_id | res_model + res_id, action,
+        comment}`` dicts. The legacy single-decision parameters are still
+        accepted and handled as a one-item batch.
+        """
+        if decisions is None:
+            decisions = [{
+                'res_model': model_name,
+                'res_id': record_id,
+                'action': action,
+                'comment': remark,
+            }]
+        if not isinstance(decisions, list):
+            return {'error': 'decisions must be a list'}
+
+        results = request.env['approval.request'].process_decisions(decisions)
+        return {
+            'success': all(result['success'] for result in results),
+            'results': results,
+        }
+
+    @http.route('/api/approvals/inbox', type='json', auth='user')
+    def inbox(self, cursor=None, limit=50, etag=None):
+        """Keyset-paginated inbox of the current user, see ``get_inbox``."""
+        try:
+            limit = max(1, min(int(limit), 200))
+        except (TypeError, ValueError):
+            raise BadRequest("limit must be an integer")
+        return request.env['approval.request'].get_inbox(cursor=cursor, limit=limit, etag=etag)
+
+    @http.route('/approval_central/export/<string:kind>', type='http', auth='user', methods=['GET'])
+    def export(self, kind, fmt='csv', domain=None, date_from=None, date_to=None, **kwargs):
+        """Stream the approval ``history`` or ``requests`` as a CSV or JSON
+        lines download, see ``approval.export``."""
+        model_name = {'history': 'approval.history', 'requests': 'approval.request'}.get(kind)
+        if not model_name or fmt not in ('csv', 'jsonl'):
+            return request.not_found()
+        try:
+            domain = json.loads(domain) if domain else []
+        except ValueError:
+            raise BadRequest("domain must be a JSON encoded domain")
+        if not isinstance(domain, list):
+            raise BadRequest("domain must be a JSON encoded domain")
+        try:
+            date_from = fields.Datetime.to_datetime(date_from) if date_from else None
+            date_to = fields.Datetime.to_datetime(date_to) if date_to else None
+        except ValueError:
+            raise BadRequest("date_from and date_to must be dates or datetimes (YYYY-MM-DD[ HH:MM:SS])")
+        # check the domain and access rights before the download starts
+        try:
+            request.env[model_name].search_count(domain, limit=1)
+        except ValueError as e:
+            raise BadRequest(f"Invalid domain: {e}")
+
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+
+        def generate():
+            # the request cursor is closed once the response is returned
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                for chunk in env['approval.export'].stream(model_name, fmt, domain, date_from, date_to):
+                    yield chunk.encode()
+
+        filename = f"approval_{kind}.{fmt}"
+        return request.make_response(generate(), headers=[
+            ('Content-Type', 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson'),
+            ('Content-Disposition', f'attachment; filename="{filename}"'),
+        ])
@@ -5,4 +5,12 @@ from .import dashboard_approval_request
 from .import approval_action
 from .import approval_delegate
 from . import popup
+from . import approval_inbox
+from . import approval_archive
+from . import approval_transition_sample
+from . import approval_flow_version
+from . import approval_mixin
+from . import approval_request_branch
+from . import approval_export
+from . import res_groups
 # from .import hooks
\ No newline at end of file
@@ -0,0 +1,148 @@
+from odoo import models, fields, api
+from datetime import timedelta
+from ..utils.concurrency import run_with_retry
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class ApprovalRequestArchive(models.Model):
+    """Closed approval requests moved out of ``approval_request``.
+
+    Archived rows keep the id they had as live requests, so history,
+    messages and external references stay resolvable. Read-only; the
+    chatter of the live request moves along with it.
+    """
+    _name = 'approval.request.archive'
+    _inherit = ['mail.thread']
+    _description = 'Archived Approval Request'
+    _order = 'id desc'
+
+    flow_id = fields.Many2one('approval.flow', string='Workflow Flow', ondelete='set null', readonly=True)
+    flow_version_id = fields.Many2one('approval.flow.version', string='Flow Version', ondelete='set null', readonly=True)
+    res_model = fields.Char(string='Resource Model', readonly=True, index=True)
+    res_id = fields.Integer(string='Resource Record ID', readonly=True)
+    current_step_id = fields.Many2one('approval.step', string='Last Step', ondelete='set null', readonly=True)
+    status = fields.Selection([
+        ('pending', 'Pending'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ], string='Status', readonly=True)
+    requested_by = fields.Many2one('res.users', string='Requested By', readonly=True)
+    requested_for_id = fields.Many2one('res.users', string='Requested For', readonly=True)
+    approved_date = fields.Datetime(string='Approved Date', readonly=True)
+    rejected_date = fields.Datetime(string='Rejected Date', readonly=True)
+    remarks = fields.Text(string='Remarks', readonly=True)
+    module_name = fields.Char(string='Resource Module', readonly=True)
+    branch_id = fields.Many2one('account.analytic.account', string='Branch', readonly=True)
+    entered_at = fields.Datetime(string='Entered Step At', readonly=True)
+    completed_step_ids = fields.Many2many(
+        'approval.step', 'approval_request_archive_step_rel', 'request_id', 'step_id',
+        string='Completed Steps', readonly=True,
+    )
+    history_ids = fields.One2many('approval.history.archive', 'request_id', string='History', readonly=True)
+    archived_date = fields.Datetime(string='Archived On', readonly=True)
+
+    @api.model
+    def _archive_closed_requests(self, days=None, chunk_size=1000, commit=False):
+        """Move requests closed more than ``days`` ago, with their history,
+        into the archive tables.
+
+        ``days`` defaults to the ``approval_central.archive_after_days``
+        parameter (365, 0 disables archival). Requests are moved
+        ``chunk_size`` at a time with set-based statements; with ``commit``
+        every chunk is committed on its own. Returns the number of requests
+        archived.
+        """
+        if days is None:
+            days = int(self.env['ir.config_parameter'].sudo().get_param(
+                'approval_central.archive_after_days', 365))
+        if days <= 0:
+            return 0
+
+        cutoff = fields.Datetime.now() - timedelta(days=days)
+        Request = self.env['approval.request']
+        History = self.env['approval.history']
+        self.env.flush_all()
+
+        archived = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM approval_request
+                 WHERE status IN ('approved', 'rejected')
+                   AND COALESCE(approved_date, rejected_date, write_date) < %s
+              ORDER BY id
+                 LIMIT %s
+            """, [cutoff, chunk_size])
+            request_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not request_ids:
+                break
+
+            self._copy_rows(Request, self, 'id', request_ids, {'archived_date': fields.Datetime.now()})
+            self._copy_rows(History, self.env['approval.history.archive'], 'request_id', request_ids)
+
+            completed = Request._fields['completed_step_ids']
+            self.env.cr.execute(f"""
+                INSERT INTO approval_request_archive_step_rel (request_id, step_id)
+                SELECT {completed.column1}, {completed.column2}
+                  FROM {completed.relation}
+                 WHERE {completed.column1} = ANY(%s)
+            """, [request_ids])
+
+            # The archive is a mail.thread: the chatter follows the request,
+            # followers and activities do not
+            self.env.cr.execute("""
+                UPDATE mail_message SET model = %s
+                 WHERE model = 'approval.request' AND res_id = ANY(%s)
+            """, [self._name, request_ids])
+            for table in ('mail_followers', 'mail_activity'):
+                self.env.cr.execute(f"""
+                    DELETE FROM {table}
+                     WHERE res_model = 'approval.request' AND res_id = ANY(%s)
+                """, [request_ids])
+
+            # History and relation rows follow through ON DELETE CASCADE
+            self.env.cr.execute("DELETE FROM approval_request WHERE id = ANY(%s)", [request_ids])
+
+            archived += len(request_ids)
+            self.env.invalidate_all()
+            if commit:
+                self.env.cr.commit()
+
+        _logger.info("Archived %s closed approval requests older than %s days.", archived, days)
+        return archived
+
+    @api.model
+    def _copy_rows(self, source, target, key, ids, extra=None):
+        """Copy the rows of ``source`` whose ``key`` is in ``ids`` into
+        ``target``, for every stored column both models have."""
+        columns = [
+            name for name, field in target._fields.items()
+            if field.store and field.column_type
+            and name in source._fields
+            and source._fields[name].store and source._fields[name].column_type
+        ]
+        extra = extra or {}
+        target_columns = ', '.join(columns + list(extra))
+        source_columns = ', '.join(columns + ['%s'] * len(extra))
+        self.env.cr.execute(f"""
+            INSERT INTO {target._table} ({target_columns})
+            SELECT {source_columns} FROM {source._table} WHERE {key} = ANY(%s)
+        """, list(extra.values()) + [ids])
+
+    @api.model
+    def _cron_archive_closed_requests(self):
+        run_with_retry(self.env, lambda env: env['approval.request.archive']._archive_closed_requests(commit=True))
+
+
+class ApprovalHistoryArchive(models.Model):
+    _name = 'approval.history.archive'
+    _description = 'Archived Approval History'
+    _order = 'date desc, id desc'
+
+    request_id = fields.Many2one('approval.request.archive', string='Approval Request', index=True, ondelete='cascade', readonly=True)
+    step_id = fields.Many2one('approval.step', string='Step', ondelete='set null', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    action_id = fields.Many2one('approval.action', string='Action', ondelete='set null', readonly=True)
+    comment = fields.Text(string='Comment', readonly=True)
+    date = fields.Datetime(string='Action Date', readonly=True)
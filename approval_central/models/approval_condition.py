@@ -69,6 +69,28 @@ class ApprovalCondition(models.Model):
 
     sequence = fields.Integer(string="Priority", default=10)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['approval.step'].browse([vals['step_id'] for vals in vals_list if vals.get('step_id')])._check_editable()
+        conditions = super().create(vals_list)
+        conditions.step_id._invalidate_approver_paths()
+        return conditions
+
+    def write(self, vals):
+        self.step_id._check_editable()
+        res = super().write(vals)
+        self.step_id._invalidate_approver_paths()
+        return res
+
+    def unlink(self):
+        self.step_id._check_editable()
+        self.step_id._invalidate_approver_paths()
+        return super().unlink()
+
+    @api.constrains('step_id', 'next_step_id')
+    def _check_flow_structure(self):
+        self.step_id.flow_id._check_structure()
+
     # ----------------------------
     # UI logic: clear irrelevant fields
     # ----------------------------
@@ -77,7 +99,7 @@ class ApprovalCondition(models.Model):
         if self.step_id:
             return {
                 'domain': {
-                    'next_step_id': [('flow_id', '=', self.step_id.flow_id.id)]
+                    'next_step_id': [('flow_id', '=', self.step_id.flow_id.id), ('version_id', '=', False)]
                 }
             }
         if self.field_to_check in ['user_group_id', 'last_updator_group']:
@@ -134,18 +156,22 @@ class ApprovalCondition(models.Model):
     # ----------------------------
     # Core method: condition evaluation
     # ----------------------------
-    def _evaluate_condition(self, request):
-        """Evaluate this condition against the given approval request record."""
+    def _evaluate_condition(self, request, record=None):
+        """Evaluate this condition against the given approval request record.
+
+        ``record`` is the request's target document when the caller already
+        browsed it (batch routing shares one prefetch set per model).
+        """
         self.ensure_one()
 
         # 1. Group check
         if self.field_to_check == 'user_group_id':
             submitter = request.create_uid
-            return self.group_id.id in submitter.groups_id.ids
+            return bool(submitter) and submitter._in_group(self.group_id)
 
         if self.field_to_check == 'last_updator_group':
             try:
-                record = self.env[request.res_model].browse(request.res_id)
+                record = record or self.env[request.res_model].browse(request.res_id)
                 if not record:
                     return False
             except Exception as e:
@@ -153,11 +179,11 @@ class ApprovalCondition(models.Model):
                 return False
 
             last_editor = record.write_uid
-            return self.group_id.id in last_editor.groups_id.ids
+            return bool(last_editor) and last_editor._in_group(self.group_id)
 
         # 2. Get target record
         try:
-            record = self.env[request.res_model].browse(request.res_id)
+            record = record or self.env[request.res_model].browse(request.res_id)
             if not record:
                 return False
         except Exception as e:
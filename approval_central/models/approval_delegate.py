@@ -1,6 +1,7 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError
 from datetime import date
+from .approval_indexes import create_approval_indexes
 
 class ApprovalDelegate(models.Model):
     _name = 'approval.delegate'
@@ -12,6 +13,25 @@ class ApprovalDelegate(models.Model):
     end_date = fields.Date(string='End Date', required=True)
     active = fields.Boolean(string='Active', default=True)
 
+    def init(self):
+        create_approval_indexes(self.env.cr, self._table)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        delegations = super().create(vals_list)
+        self.env['approval.request']._invalidate_approver_paths()
+        return delegations
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['approval.request']._invalidate_approver_paths()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['approval.request']._invalidate_approver_paths()
+        return res
+
     @api.model
     def get_delegate(self, users):
         """Return users + valid delegates for today"""
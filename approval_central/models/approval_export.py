@@ -0,0 +1,181 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from datetime import timedelta
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+# Date field the date filters apply to, per exported model
+EXPORT_DATE_FIELDS = {
+    'approval.history': 'date',
+    'approval.request': 'create_date',
+}
+
+EXPORT_COLUMNS = {
+    'approval.history': [
+        'id', 'date', 'request_id', 'res_model', 'res_id', 'target', 'flow', 'step', 'action',
+        'user', 'comment', 'request_status',
+    ],
+    'approval.request': [
+        'id', 'create_date', 'flow', 'flow_version', 'res_model', 'res_id', 'target', 'module_name',
+        'status', 'current_step', 'approvers', 'requested_by', 'requested_for', 'entered_at',
+        'approved_date', 'rejected_date',
+    ],
+}
+
+
+class ApprovalExport(models.AbstractModel):
+    """Streaming audit export of approval history and requests.
+
+    Matching ids are read through a server-side cursor and the records
+    are loaded ``batch_size`` at a time, with the display names of the
+    target documents read per model, so memory stays flat however many
+    rows are exported. Rows are produced as CSV or JSON lines chunks, for
+    the download controller or for ``export_to_file``.
+    """
+    _name = 'approval.export'
+    _description = 'Approval Audit Export'
+
+    @api.model
+    def stream(self, model_name, fmt='csv', domain=None, date_from=None, date_to=None, batch_size=2000):
+        """Yield the export of ``model_name`` (approval.history or
+        approval.request) as text chunks, one per batch.
+
+        ``domain`` filters the records with the access rules of the current
+        user; ``date_from`` and ``date_to`` (dates, datetimes or their
+        string forms) bound the history date or the request creation date,
+        both included. As this is a generator, nothing is checked before
+        the first chunk is read: callers streaming a response validate
+        their arguments first.
+        """
+        if model_name not in EXPORT_COLUMNS:
+            raise UserError(f"Cannot export '{model_name}'.")
+        if fmt not in ('csv', 'jsonl'):
+            raise UserError(f"Unknown export format '{fmt}'.")
+        columns = EXPORT_COLUMNS[model_name]
+        rows = self._iter_rows(model_name, domain, date_from, date_to, batch_size)
+        if fmt == 'jsonl':
+            for batch in rows:
+                yield ''.join(json.dumps(row, default=str) + '\n' for row in batch)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        for batch in rows:
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @api.model
+    def export_to_file(self, path, model_name, fmt='csv', domain=None, date_from=None, date_to=None, batch_size=2000):
+        """Write the export to the local file ``path``; return the path.
+
+        The file is written next to ``path`` and renamed once complete, so
+        readers never see a partial export."""
+        partial = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        try:
+            with open(partial, 'w', newline='', encoding='utf-8') as f:
+                for chunk in self.stream(model_name, fmt, domain, date_from, date_to, batch_size):
+                    f.write(chunk)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        return path
+
+    @api.model
+    def _iter_rows(self, model_name, domain, date_from, date_to, batch_size):
+        """Yield lists of row dicts, ``batch_size`` records at a time."""
+        Model = self.env[model_name]
+        domain = list(domain or [])
+        date_field = EXPORT_DATE_FIELDS[model_name]
+        if date_from:
+            domain.append((date_field, '>=', fields.Datetime.to_datetime(date_from)))
+        if date_to:
+            date_to = fields.Datetime.to_datetime(date_to)
+            if date_to == date_to.replace(hour=0, minute=0, second=0, microsecond=0):
+                # a bare date includes the whole day
+                date_to += timedelta(days=1)
+                domain.append((date_field, '<', date_to))
+            else:
+                domain.append((date_field, '<=', date_to))
+
+        self.env.flush_all()
+        query = Model._search(domain, order='id')
+        select = query.select()
+        # named cursor: rows stay on the server until fetched
+        with self.env.cr._cnx.cursor(f'approval_export_{uuid.uuid4().hex[:8]}') as ids_cursor:
+            ids_cursor.execute(select.code, select.params)
+            while True:
+                ids = [row[0] for row in ids_cursor.fetchmany(batch_size)]
+                if not ids:
+                    break
+                records = Model.browse(ids)
+                if model_name == 'approval.history':
+                    yield self._history_rows(records)
+                else:
+                    yield self._request_rows(records)
+                # keep memory flat: forget the batch
+                self.env.invalidate_all()
+
+    @api.model
+    def _history_rows(self, history):
+        targets = history.request_id._get_target_display_names()
+        return [{
+            'id': entry.id,
+            'date': entry.date,
+            'request_id': entry.request_id.id,
+            'res_model': entry.request_id.res_model,
+            'res_id': entry.request_id.res_id,
+            'target': targets.get(entry.request_id.id, ''),
+            'flow': entry.request_id.flow_id.name,
+            'step': entry.step_id.name or '',
+            'action': entry.action_id.code,
+            'user': entry.user_id.name or '',
+            'comment': entry.comment or '',
+            'request_status': entry.request_id.status,
+        } for entry in history]
+
+    @api.model
+    def _request_rows(self, requests):
+        targets = requests._get_target_display_names()
+        return [{
+            'id': req.id,
+            'create_date': req.create_date,
+            'flow': req.flow_id.name,
+            'flow_version': req.flow_version_id.version or '',
+            'res_model': req.res_model,
+            'res_id': req.res_id,
+            'target': targets.get(req.id, ''),
+            'module_name': req.module_name,
+            'status': req.status,
+            'current_step': req.current_step_id.name or '',
+            'approvers': ', '.join(req.approver_ids.mapped('name')),
+            'requested_by': req.requested_by.name or '',
+            'requested_for': req.requested_for_id.name or '',
+            'entered_at': req.entered_at or '',
+            'approved_date': req.approved_date or '',
+            'rejected_date': req.rejected_date or '',
+        } for req in requests]
+
+    @api.model
+    def _cron_export_history(self):
+        """Export the approval history of the previous day to the directory
+        named by ``approval_central.export_dir``."""
+        directory = self.env['ir.config_parameter'].sudo().get_param('approval_central.export_dir')
+        if not directory:
+            _logger.info("No approval_central.export_dir configured, approval history not exported.")
+            return
+        day = fields.Date.context_today(self) - timedelta(days=1)
+        path = os.path.join(directory, f"approval_history_{day}.csv")
+        self.export_to_file(path, 'approval.history', date_from=day, date_to=day)
+        _logger.info("Exported approval history of %s to %s", day, path)
@@ -0,0 +1,143 @@
+# Static analysis of approval flows, run when a flow or one of its steps,
+# conditions or step actions is saved, and when a flow version is published.
+# The result is stored on the flow or version (compiled_structure) and read
+# by the engine at runtime.
+
+# Actions that send a request back instead of forward: a cycle through them
+# is expected (amend, revert) and not reported.
+BACKWARD_ACTIONS = {'amend', 'revert', 'reject'}
+
+
+def analyze_flow(steps):
+    """Return the compiled structure of the flow made of ``steps``.
+
+    ``order``              step ids by (sequence, id)
+    ``next_organization``  {organization step id: next organization step id
+                           in that order}
+    ``reachable``          ids of the steps reachable from the initiator
+    ``errors``             problems the engine cannot run with: condition
+                           cycles, next steps in other flows, parallel
+                           splits without a join step or branches
+    ``warnings``           unreachable steps, missing initiator or final
+                           step, cycles through forward actions
+
+    Keys of mappings are strings, as they are stored as JSON.
+    """
+    steps = steps.sorted(key=lambda s: (s.sequence, s.id))
+    step_ids = set(steps.ids)
+    errors = []
+    warnings = []
+
+    edges = {step.id: [] for step in steps}
+    for step in steps:
+        targets = [(condition.next_step_id, 'condition') for condition in step.condition_ids]
+        targets += [(action.next_step_id, action.action_id.code) for action in step.action_ids]
+        targets += [(next_step, 'next') for next_step in step.next_step_ids]
+        for target, kind in targets:
+            if not target:
+                continue
+            if target.id not in step_ids:
+                errors.append(
+                    f"Step '{step.name}' leads to step '{target.name}' of another flow "
+                    f"('{target.flow_id.name}')."
+                )
+                continue
+            edges[step.id].append((target.id, kind))
+
+    for step in steps.filtered('is_parallel_split'):
+        if not step.join_step_id:
+            errors.append(f"Parallel step '{step.name}' has no join step.")
+        elif step.join_step_id.id not in step_ids:
+            errors.append(f"Parallel step '{step.name}' joins at step '{step.join_step_id.name}' of another flow.")
+        elif step.join_step_id in step.next_step_ids:
+            errors.append(f"Parallel step '{step.name}' cannot start a branch at its join step.")
+        if len(step.next_step_ids) < 2:
+            errors.append(f"Parallel step '{step.name}' needs at least two next steps, one per branch.")
+        if step.required_branches > len(step.next_step_ids):
+            errors.append(f"Parallel step '{step.name}' requires more branches than it has next steps.")
+
+    names = {step.id: step.name for step in steps}
+    condition_steps = {step.id for step in steps if step.is_condition}
+    condition_edges = {
+        step_id: [target for target, kind in targets if kind == 'condition' and target in condition_steps]
+        for step_id, targets in edges.items() if step_id in condition_steps
+    }
+    for cycle in _find_cycles(condition_edges):
+        errors.append("Condition steps loop: " + " → ".join(names[step_id] for step_id in cycle))
+
+    forward_edges = {
+        step_id: [target for target, kind in targets if kind not in BACKWARD_ACTIONS]
+        for step_id, targets in edges.items()
+    }
+    for cycle in _find_cycles(forward_edges):
+        if not set(cycle) <= condition_steps:
+            warnings.append("Steps loop: " + " → ".join(names[step_id] for step_id in cycle))
+
+    # An organization step nobody in the hierarchy can approve hands over
+    # to the next organization step in sequence
+    next_organization = {}
+    following = None
+    for step in reversed(steps):
+        if step.is_organization:
+            if following:
+                next_organization[str(step.id)] = following
+                edges[step.id].append((following, 'organization'))
+            following = step.id
+
+    initiators = [step.id for step in steps if step.is_initiator]
+    reachable = set(initiators)
+    stack = list(initiators)
+    while stack:
+        for target, __ in edges[stack.pop()]:
+            if target not in reachable:
+                reachable.add(target)
+                stack.append(target)
+
+    if steps and not initiators:
+        warnings.append("The flow has no initiator step.")
+    if steps and not any(step.is_final for step in steps):
+        warnings.append("The flow has no final step.")
+    elif initiators and not any(step.is_final and step.id in reachable for step in steps):
+        warnings.append("No final step can be reached from the initiator step.")
+    if initiators:
+        for step in steps:
+            if step.id not in reachable:
+                warnings.append(f"Step '{step.name}' cannot be reached from the initiator step.")
+
+    return {
+        'order': steps.ids,
+        'next_organization': next_organization,
+        'reachable': sorted(reachable),
+        'errors': errors,
+        'warnings': warnings,
+    }
+
+
+def _find_cycles(edges):
+    """Return the cycles of ``edges`` ({node: [target nodes]}) found by a
+    depth-first walk, one per edge closing a loop, as lists of node ids
+    starting and ending with the same node."""
+    cycles = []
+    state = {}  # node -> 1 while on the current path, 2 once done
+    for root in edges:
+        if root in state:
+            continue
+        path = []
+        stack = [(root, iter(edges.get(root, ())))]
+        state[root] = 1
+        path.append(root)
+        while stack:
+            node, targets = stack[-1]
+            for target in targets:
+                if state.get(target) == 1:
+                    cycles.append(path[path.index(target):] + [target])
+                elif target not in state:
+                    state[target] = 1
+                    path.append(target)
+                    stack.append((target, iter(edges.get(target, ()))))
+                    break
+            else:
+                stack.pop()
+                path.pop()
+                state[node] = 2
+    return cycles
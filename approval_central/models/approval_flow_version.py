@@ -0,0 +1,115 @@
+from odoo import models, fields, api, tools
+from odoo.exceptions import UserError
+from .approval_flow_analysis import analyze_flow
+
+
+class ApprovalFlowVersion(models.Model):
+    """Immutable snapshot of a flow, taken when the flow is published.
+
+    The steps, conditions and actions of the flow are copied into steps
+    owned by the version (``approval.step.version_id``), which cannot be
+    modified afterwards. Requests pin the current version of their flow
+    when they are created, so later edits of the flow do not change how
+    requests in progress are routed.
+    """
+    _name = 'approval.flow.version'
+    _description = 'Approval Flow Version'
+    _order = 'flow_id, version desc'
+
+    flow_id = fields.Many2one('approval.flow', string='Flow', required=True, ondelete='cascade', readonly=True)
+    version = fields.Integer(string='Version', required=True, readonly=True)
+    published_date = fields.Datetime(string='Published On', default=fields.Datetime.now, readonly=True)
+    published_by = fields.Many2one('res.users', string='Published By', default=lambda self: self.env.user, readonly=True)
+    step_ids = fields.One2many('approval.step', 'version_id', string='Steps', readonly=True)
+    compiled_structure = fields.Json(string='Compiled Structure', readonly=True)
+
+    _sql_constraints = [
+        ('flow_version_uniq', 'unique(flow_id, version)', 'Flow versions must be unique per flow.'),
+    ]
+
+    def _compute_display_name(self):
+        for version in self:
+            version.display_name = f"{version.flow_id.name} v{version.version}"
+
+    def unlink(self):
+        if self.env['approval.request'].sudo().search_count([('flow_version_id', 'in', self.ids)], limit=1):
+            raise UserError("Flow versions followed by approval requests cannot be deleted.")
+        return super().unlink()
+
+    @api.model
+    def _publish(self, flow):
+        """Snapshot the current steps of ``flow`` into a new version."""
+        flow._check_structure()
+        steps = flow.step_ids
+        if not steps:
+            raise UserError(f"Flow '{flow.name}' has no steps to publish.")
+
+        version = self.create({
+            'flow_id': flow.id,
+            'version': max(flow.version_ids.mapped('version'), default=0) + 1,
+        })
+
+        publishing = self.with_context(approval_publishing=True)
+        Step = publishing.env['approval.step']
+        # Condition steps are flagged once their conditions exist
+        copies = Step.create([
+            step.copy_data({
+                'version_id': version.id,
+                'origin_step_id': step.id,
+                'is_condition': False,
+                'next_step_ids': [],
+                'join_step_id': False,
+            })[0]
+            for step in steps
+        ])
+        copy_ids = dict(zip(steps.ids, copies.ids))
+
+        publishing.env['approval.condition'].create([
+            condition.copy_data({
+                'step_id': copy_ids[step.id],
+                'next_step_id': copy_ids[condition.next_step_id.id],
+            })[0]
+            for step in steps for condition in step.condition_ids
+        ])
+        publishing.env['approval.step.action'].create([
+            action.copy_data({
+                'step_id': copy_ids[step.id],
+                'next_step_id': copy_ids.get(action.next_step_id.id, False),
+            })[0]
+            for step in steps for action in step.action_ids
+        ])
+        for step, step_copy in zip(steps, copies):
+            links = {}
+            if step.next_step_ids:
+                links['next_step_ids'] = [(6, 0, [copy_ids[s.id] for s in step.next_step_ids])]
+            if step.join_step_id:
+                links['join_step_id'] = copy_ids[step.join_step_id.id]
+            if links:
+                step_copy.write(links)
+        copies.filtered(lambda c: c.origin_step_id.is_condition).write({'is_condition': True})
+
+        structure = analyze_flow(copies)
+        structure['origins'] = {str(origin_id): copy_id for origin_id, copy_id in copy_ids.items()}
+        version.compiled_structure = structure
+        return version
+
+    @api.model
+    @tools.ormcache('version_id')
+    def _get_structure(self, version_id):
+        """Compiled structure of a version. Versions never change, so the
+        cache is never invalidated. Callers must not modify the result."""
+        return self.browse(version_id).compiled_structure or {}
+
+    def _get_ordered_steps(self):
+        self.ensure_one()
+        return self.env['approval.step'].browse(self._get_structure(self.id).get('order', []))
+
+    def _get_next_organization_step(self, step):
+        self.ensure_one()
+        next_organization = self._get_structure(self.id).get('next_organization', {})
+        return self.env['approval.step'].browse(next_organization.get(str(step.id)) or [])
+
+    def _map_step(self, step_id):
+        """The id of the copy of live step ``step_id`` in this version."""
+        self.ensure_one()
+        return self._get_structure(self.id).get('origins', {}).get(str(step_id))
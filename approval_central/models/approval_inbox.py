@@ -0,0 +1,48 @@
+from odoo import models, fields, api
+
+TOUCHED_USERS_KEY = 'approval_central.inbox_touched_users'
+
+
+class ApprovalInboxVersion(models.Model):
+    _name = 'approval.inbox.version'
+    _description = 'Approval Inbox Version'
+    _log_access = False
+
+    user_id = fields.Many2one('res.users', string='User', required=True, ondelete='cascade')
+    version = fields.Integer(string='Version', default=0)
+
+    _sql_constraints = [
+        ('user_uniq', 'unique(user_id)', 'Only one inbox version per user.'),
+    ]
+
+    @api.model
+    def _get_version(self, user_id):
+        self.env.cr.execute("SELECT version FROM approval_inbox_version WHERE user_id = %s", [user_id])
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _touch(self, user_ids):
+        """Mark the inboxes of ``user_ids`` as changed.
+
+        Versions are bumped once per transaction, right before commit, so
+        the version rows stay locked for as short as possible.
+        """
+        if not user_ids:
+            return
+        data = self.env.cr.precommit.data
+        touched = data.get(TOUCHED_USERS_KEY)
+        if touched is None:
+            touched = data[TOUCHED_USERS_KEY] = set()
+            self.env.cr.precommit.add(self._flush_touched)
+        touched.update(user_ids)
+
+    def _flush_touched(self):
+        user_ids = self.env.cr.precommit.data.pop(TOUCHED_USERS_KEY, set())
+        if not user_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO approval_inbox_version (user_id, version)
+            SELECT user_id, 1 FROM unnest(%s) AS user_id
+            ON CONFLICT (user_id) DO UPDATE SET version = approval_inbox_version.version + 1
+        """, [sorted(user_ids)])
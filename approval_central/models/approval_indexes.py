@@ -0,0 +1,88 @@
+import logging
+
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+# (index name, table, expressions, WHERE clause) matching the engine's access paths
+APPROVAL_INDEXES = [
+    # target document lookup (decisions, menus, source documents)
+    ('approval_request_res_model_res_id_idx', 'approval_request', ['res_model', 'res_id'], ''),
+    # dashboard and per-module menus
+    ('approval_request_status_module_idx', 'approval_request', ['status', 'module_name'], ''),
+    ('approval_request_pending_model_idx', 'approval_request', ['res_model', 'module_name'], "status = 'pending'"),
+    # step lookups and step deletion (foreign key)
+    ('approval_request_current_step_idx', 'approval_request', ['current_step_id'], ''),
+    # overdue requests (SLA escalation)
+    ('approval_request_status_step_entered_idx', 'approval_request', ['status', 'current_step_id', 'entered_at'], ''),
+    # archival of closed requests
+    ('approval_request_closed_date_idx', 'approval_request',
+     ['(COALESCE(approved_date, rejected_date, write_date))'], "status IN ('approved', 'rejected')"),
+    # committee vote counts
+    ('approval_history_request_step_action_idx', 'approval_history', ['request_id', 'step_id', 'action_id'], ''),
+    # delegations valid today
+    ('approval_delegate_active_user_dates_idx', 'approval_delegate',
+     ['original_user_id', 'start_date', 'end_date'], 'active'),
+    # last org chart change (approver path stamp), when hr is installed
+    ('approval_hr_employee_write_date_idx', 'hr_employee', ['write_date'], ''),
+    ('approval_hr_job_write_date_idx', 'hr_job', ['write_date'], ''),
+]
+
+# Same shape, for unique indexes
+APPROVAL_UNIQUE_INDEXES = [
+    # one pending request per document and flow; closed requests are kept
+    # as history, so documents can be submitted again
+    ('approval_request_pending_document_flow_uniq', 'approval_request',
+     ['res_model', 'res_id', 'flow_id'], "status = 'pending'"),
+]
+
+
+def create_approval_indexes(cr, table):
+    """Create the missing indexes of ``APPROVAL_INDEXES`` on ``table``."""
+    for name, index_table, expressions, where in APPROVAL_INDEXES:
+        if index_table == table and not sql.index_exists(cr, name):
+            sql.create_index(cr, name, table, expressions, where=where)
+    for name, index_table, expressions, where in APPROVAL_UNIQUE_INDEXES:
+        if index_table != table or sql.index_exists(cr, name):
+            continue
+        columns = ', '.join(expressions)
+        cr.execute(f"""
+            SELECT 1 FROM "{table}" WHERE {where}
+             GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT 1
+        """)
+        if cr.fetchone():
+            _logger.error(
+                "Unique index %s NOT created: %s has duplicate rows on (%s) WHERE %s. "
+                "Close or delete the duplicates and update the module to enforce it.",
+                name, table, columns, where,
+            )
+            continue
+        cr.execute(f'CREATE UNIQUE INDEX "{name}" ON "{table}" ({columns}) WHERE {where}')
+
+
+def check_approval_indexes(cr):
+    """Report the approval indexes that are missing or never scanned.
+
+    Scan counts come from ``pg_stat_user_indexes`` and are only meaningful
+    once the database has seen real traffic since its statistics reset.
+    """
+    names = [
+        name for name, table, __, __ in APPROVAL_INDEXES + APPROVAL_UNIQUE_INDEXES
+        if sql.table_exists(cr, table)
+    ]
+    cr.execute("""
+        SELECT indexrelname, idx_scan
+          FROM pg_stat_user_indexes
+         WHERE indexrelname = ANY(%s)
+    """, [names])
+    scans = dict(cr.fetchall())
+
+    report = {
+        'missing': [name for name in names if name not in scans],
+        'unused': [name for name in names if scans.get(name) == 0],
+    }
+    if report['missing']:
+        _logger.warning("Missing approval indexes: %s", ', '.join(report['missing']))
+    if report['unused']:
+        _logger.info("Approval indexes never scanned: %s", ', '.join(report['unused']))
+    return report
@@ -0,0 +1,42 @@
+from odoo import models, fields
+
+
+class ApprovalMixin(models.AbstractModel):
+    """Source documents going through approval requests.
+
+    The engine links a document to its latest request when the request is
+    created, and copies the status of the request to the document whenever
+    it changes, so lists of documents can be filtered and sorted by approval
+    state without reading ``approval.request``.
+    """
+    _name = 'approval.mixin'
+    _description = 'Approval Source Document'
+
+    approval_request_id = fields.Many2one(
+        'approval.request',
+        string='Approval Request',
+        readonly=True,
+        copy=False,
+        index='btree_not_null',
+        ondelete='set null',
+    )
+    # Written by the engine rather than related to the request: it outlives
+    # requests moved to the archive
+    approval_status = fields.Selection([
+        ('pending', 'Pending'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ], string='Approval Status', readonly=True, copy=False, index=True)
+
+    def action_open_approval_request(self):
+        self.ensure_one()
+        if not self.approval_request_id:
+            return False
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Approval Request',
+            'res_model': 'approval.request',
+            'res_id': self.approval_request_id.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
@@ -0,0 +1,29 @@
+from odoo import models, fields
+
+
+class ApprovalRequestBranch(models.Model):
+    """One branch of a request split by a parallel step.
+
+    Each branch sits on its own step with its own approvers until it
+    reaches the join step of its split; the request keeps the union of the
+    approvers of its pending branches and counts the branches it still
+    waits for (``approval.request.branches_remaining``). Branches are
+    engine state and are only written by the engine.
+    """
+    _name = 'approval.request.branch'
+    _description = 'Approval Request Branch'
+    _order = 'request_id, id'
+
+    request_id = fields.Many2one('approval.request', string='Approval Request', required=True, ondelete='cascade', index=True)
+    split_step_id = fields.Many2one('approval.step', string='Split Step', required=True, ondelete='cascade')
+    step_id = fields.Many2one('approval.step', string='Current Step', ondelete='cascade')
+    approver_ids = fields.Many2many(
+        'res.users', 'approval_request_branch_users_rel', 'branch_id', 'user_id',
+        string='Approvers',
+    )
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ], string='State', default='pending', required=True)
+    done_date = fields.Datetime(string='Done On')
@@ -1,15 +1,51 @@
-from odoo import models, fields, api
-from odoo.exceptions import ValidationError, UserError
+from odoo import models, fields, api, tools
+from odoo.exceptions import AccessError, ValidationError, UserError
+from odoo.tools import html_escape, sql
+from .approval_indexes import create_approval_indexes, check_approval_indexes
+from ..utils import instrumentation, tracing
+from ..utils.concurrency import CONCURRENCY_ERRORS, TransitionConflict, run_with_retry
+from ..utils.notification import queue_notification_to_users
+from collections import Counter, defaultdict
 from datetime import timedelta
+from markupsafe import Markup
+from psycopg2 import IntegrityError, errors
+import json
 import logging
 
 _logger = logging.getLogger(__name__)
+
+# First key of the advisory locks taken on approval requests
+TRANSITION_LOCK_NAMESPACE = 0x41505052  # "APPR"
+
+# Unique constraint of the idempotency keys of approval.history
+IDEMPOTENCY_CONSTRAINT = 'approval_history_request_idempotency_key_uniq'
+
+# Fields that change what a user sees in their approval inbox
+INBOX_FIELDS = {'approver_ids', 'status', 'current_step_id', 'entered_at', 'flow_id'}
+
+# Request fields identifying the pending request of a document
+PENDING_KEY_FIELDS = {'res_model', 'res_id', 'flow_id'}
+
+# Request fields the pre-resolved approver path depends on
+APPROVER_PATH_FIELDS = {'flow_id', 'flow_version_id', 'branch_id', 'requested_for_id'}
+
+# Bumped when group or delegation data changes, see _invalidate_approver_paths
+APPROVER_PATH_SEQUENCE = 'approval_approver_path_seq'
+
+
 class ApprovalRequest(models.Model):
     _name = 'approval.request'
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _description = 'Approval Request'
 
     flow_id = fields.Many2one('approval.flow', string='Workflow Flow', required=True)
+    flow_version_id = fields.Many2one(
+        'approval.flow.version',
+        string='Flow Version',
+        readonly=True,
+        index=True,
+        help="Published version of the flow this request follows, pinned at creation."
+    )
     res_model = fields.Char(string='Resource Model', required=True)
     res_id = fields.Integer(string='Resource Record ID', required=True)
     current_step_id = fields.Many2one('approval.step', string='Current Step')
@@ -33,9 +69,340 @@ class ApprovalRequest(models.Model):
         string='Requested For',
         help="Employee the request is about or should be reviewed by."
     )
+    entered_at = fields.Datetime(
+        string='Entered Step At',
+        default=fields.Datetime.now,
+        readonly=True,
+        help="When the request entered its current step."
+    )
+    branch_ids = fields.One2many('approval.request.branch', 'request_id', string='Parallel Branches', readonly=True)
+    branches_remaining = fields.Integer(
+        string='Branches Remaining',
+        readonly=True,
+        copy=False,
+        help="Parallel branches the request still waits for before moving to the join step."
+    )
+    approver_path = fields.Json(
+        string='Approver Path',
+        readonly=True,
+        copy=False,
+        help="Approvers of the remaining steps, resolved in advance when the flow pre-resolves approvers."
+    )
+    expected_approvers = fields.Text(string='Expected Approvers', compute='_compute_expected_approvers')
+    sla_escalated_at = fields.Datetime(
+        string='Escalated At',
+        readonly=True,
+        copy=False,
+        help="Last SLA escalation of the request at its current step."
+    )
+
+    def init(self):
+        create_approval_indexes(self.env.cr, self._table)
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {APPROVER_PATH_SEQUENCE}")
+        self.env.cr.execute("""
+            UPDATE approval_request
+               SET entered_at = COALESCE(write_date, create_date)
+             WHERE entered_at IS NULL
+        """)
+
+    def _register_hook(self):
+        super()._register_hook()
+        # org chart tables keep the approver path stamp cheap; hr may be
+        # installed after this module, so they are indexed once they exist
+        for table in ('hr_employee', 'hr_job'):
+            if sql.table_exists(self.env.cr, table):
+                create_approval_indexes(self.env.cr, table)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if self._history_only_tracking():
+            self = self.with_context(mail_create_nolog=True, mail_notrack=True)
+        vals_list = self._pin_flow_versions(vals_list)
+        self._check_single_pending([
+            (vals.get('res_model'), vals.get('res_id'), vals.get('flow_id'))
+            for vals in vals_list if vals.get('status', 'pending') == 'pending'
+        ])
+        requests = super().create(vals_list)
+        self.env['approval.inbox.version']._touch(set(requests.approver_ids.ids))
+
+        menu_xmlids = self._get_dynamic_action_xmlids()
+        new_models = {
+            res_model for res_model in set(requests.mapped('res_model'))
+            if self._dynamic_action_xmlid(res_model) not in menu_xmlids
+        }
+        if new_models:
+            try:
+                with self.env.cr.savepoint():
+                    self._create_dynamic_menus(new_models)
+            except IntegrityError:
+                # a concurrent first request of the same model created them
+                _logger.info("Approval menus of %s created concurrently.", ', '.join(sorted(new_models)))
+        requests._link_source_documents()
+        requests._preresolve_approver_path()
+        return requests
+
+    @api.model
+    def _check_single_pending(self, keys, exclude_ids=()):
+        """Raise a UserError when one of the (res_model, res_id, flow id)
+        ``keys`` appears twice or already has a pending request, other than
+        ``exclude_ids``: a document has at most one pending request per flow
+        (see the approval_request_pending_document_flow_uniq index)."""
+        keys = [key for key in keys if all(key)]
+        if not keys:
+            return
+        duplicates = [key for key, count in Counter(keys).items() if count > 1]
+        if not duplicates:
+            self.flush_model(['res_model', 'res_id', 'flow_id', 'status'])
+            self.env.cr.execute("""
+                SELECT res_model, res_id, flow_id FROM approval_request
+                 WHERE status = 'pending' AND (res_model, res_id, flow_id) IN %s
+                   AND NOT id = ANY(%s)
+                 LIMIT 1
+            """, [tuple(set(keys)), list(exclude_ids)])
+            duplicates = self.env.cr.fetchall()
+        if duplicates:
+            res_model, res_id, flow_id = duplicates[0]
+            raise UserError(
+                f"{res_model} #{res_id} already has a pending approval request for flow "
+                f"'{self.env['approval.flow'].browse(flow_id).name}'."
+            )
+
+    def _get_mixin_models(self):
+        """Return {model name: [requests]} for the target models using
+        ``approval.mixin``."""
+        Mixin = self.pool['approval.mixin']
+        return {
+            model_name: reqs for model_name, reqs in self._group_by_model().items()
+            if issubclass(self.pool[model_name], Mixin)
+        }
+
+    def _link_source_documents(self):
+        """Point the documents of ``self`` that use ``approval.mixin`` to
+        their request and copy its status, with one write per document."""
+        for model_name, reqs in self._get_mixin_models().items():
+            documents = self.env[model_name].sudo().browse([req.res_id for req in reqs])
+            for req, document in zip(reqs, documents):
+                document.write({'approval_request_id': req.id, 'approval_status': req.status})
+            instrumentation.add_rows(len(documents))
+
+    def _sync_source_documents(self):
+        """Copy the status of ``self`` to the documents linked to them, with
+        one write per model and status."""
+        for model_name, reqs in self._get_mixin_models().items():
+            documents = self.env[model_name].sudo().search([('approval_request_id', 'in', [req.id for req in reqs])])
+            by_status = defaultdict(list)
+            for document in documents:
+                by_status[document.approval_request_id.status].append(document.id)
+            for status, document_ids in by_status.items():
+                documents.browse(document_ids).write({'approval_status': status})
+            instrumentation.add_rows(len(documents))
+
+    @api.model
+    def _pin_flow_versions(self, vals_list):
+        """Pin new requests to the current version of their flow, and move
+        a given current step from the live flow to its copy in that version."""
+        flows = self.env['approval.flow'].browse({vals['flow_id'] for vals in vals_list if vals.get('flow_id')})
+        versions = {flow.id: flow.current_version_id for flow in flows}
+        pinned = []
+        for vals in vals_list:
+            version = versions.get(vals.get('flow_id'))
+            if version and 'flow_version_id' not in vals:
+                vals = dict(vals, flow_version_id=version.id)
+                if vals.get('current_step_id'):
+                    vals['current_step_id'] = version._map_step(vals['current_step_id']) or vals['current_step_id']
+            pinned.append(vals)
+        return pinned
+
+    def _get_flow_definition(self):
+        """The pinned flow version, or the live flow for unpinned requests."""
+        self.ensure_one()
+        return self.flow_version_id or self.flow_id
+
+    @api.model
+    def _dynamic_action_xmlid(self, model_name):
+        return f"approval_action_{model_name.replace('.', '_')}"
+
+    @api.model
+    @tools.ormcache()
+    def _get_dynamic_action_xmlids(self):
+        """Names of the xmlids of the dynamic approval actions, so models
+        without one are not looked up again on every create. Creating menus
+        clears the registry cache, which refreshes this set."""
+        self.env['ir.model.data'].flush_model(['module', 'name'])
+        self.env.cr.execute("""
+            SELECT name FROM ir_model_data
+             WHERE module = 'approval_central' AND model = 'ir.actions.act_window'
+               AND name LIKE 'approval\\_action\\_%%'
+        """)
+        return frozenset(row[0] for row in self.env.cr.fetchall())
+
+    def _create_dynamic_menus(self, model_names):
+        """Create an "<Model> Approvals" action and menu under the approval
+        root menu for each of ``model_names`` that does not have one yet."""
+        parent_menu = self.env.ref('approval_central.menu_approval_root', raise_if_not_found=False)
+        if not parent_menu:
+            _logger.error("Root menu not found. Check XML ID 'approval_central.menu_approval_root'")
+            return
+
+        ir_models = self.env['ir.model'].sudo().search([('model', 'in', list(model_names))])
+        missing = set(model_names) - set(ir_models.mapped('model'))
+        if missing:
+            _logger.warning("Model not found in ir.model: %s", ', '.join(sorted(missing)))
+
+        # Prevent duplicate menus
+        menu_names = {model.model: f"{model.name} Approvals" for model in ir_models}
+        existing_names = set(self.env['ir.ui.menu'].sudo().search([
+            ('parent_id', '=', parent_menu.id),
+            ('name', 'in', list(menu_names.values())),
+        ]).mapped('name'))
+        ir_models = ir_models.filtered(lambda m: menu_names[m.model] not in existing_names)
+        if not ir_models:
+            return
+
+        actions = self.env['ir.actions.act_window'].sudo().create([{
+            'name': menu_names[model.model],
+            'res_model': 'approval.request',
+            'view_mode': 'tree,kanban,form',
+            'domain': [('res_model', '=', model.model)],
+        } for model in ir_models])
+
+        # Register external IDs
+        self.env['ir.model.data'].sudo().create([{
+            'name': self._dynamic_action_xmlid(model.model),
+            'model': 'ir.actions.act_window',
+            'module': 'approval_central',
+            'res_id': action.id,
+            'noupdate': True,
+        } for model, action in zip(ir_models, actions)])
+
+        self.env['ir.ui.menu'].sudo().create([{
+            'name': action.name,
+            'parent_id': parent_menu.id,
+            'action': f'{action._name},{action.id}',
+            'sequence': 10,
+        } for action in actions])
+
+        _logger.info("Created menus and actions for models: %s", ', '.join(ir_models.mapped('model')))
+
+    def write(self, vals):
+        if self._history_only_tracking():
+            self = self.with_context(mail_notrack=True)
+        if 'current_step_id' in vals and 'entered_at' not in vals:
+            vals = dict(vals, entered_at=fields.Datetime.now(), sla_escalated_at=False)
+        if vals.get('status') == 'pending' or not PENDING_KEY_FIELDS.isdisjoint(vals):
+            self._check_single_pending([
+                (vals.get('res_model', req.res_model), vals.get('res_id', req.res_id), vals.get('flow_id', req.flow_id.id))
+                for req in self
+                if vals.get('status', req.status) == 'pending'
+                and (req.status != 'pending' or not PENDING_KEY_FIELDS.isdisjoint(vals))
+            ], exclude_ids=self.ids)
+        inbox_changed = not INBOX_FIELDS.isdisjoint(vals)
+        if inbox_changed:
+            touched_user_ids = set(self.approver_ids.ids)
+        res = super().write(vals)
+        instrumentation.add_rows(len(self))
+        if 'status' in vals:
+            self._sync_source_documents()
+            if vals['status'] in ('approved', 'rejected'):
+                self._notify_requesters(vals['status'])
+        if not APPROVER_PATH_FIELDS.isdisjoint(vals):
+            self._preresolve_approver_path()
+        if inbox_changed:
+            touched_user_ids.update(self.approver_ids.ids)
+            self.env['approval.inbox.version']._touch(touched_user_ids)
+        return res
+
+    def unlink(self):
+        touched_user_ids = set(self.filtered(lambda r: r.status == 'pending').approver_ids.ids)
+        res = super().unlink()
+        self.env['approval.inbox.version']._touch(touched_user_ids)
+        return res
+
+    @api.model
+    def check_indexes(self):
+        """Return the approval indexes that are missing or unused, see
+        ``check_approval_indexes``."""
+        return check_approval_indexes(self.env.cr)
+
+    @api.model
+    def _history_only_tracking(self):
+        """Whether transitions are audited in approval.history only, without
+        mail tracking messages (``approval_central.history_only_tracking``)."""
+        param = self.env['ir.config_parameter'].sudo().get_param('approval_central.history_only_tracking')
+        return str(param).lower() in ('1', 'true', 'yes')
+
+    @api.model
+    def get_inbox(self, cursor=None, limit=50, etag=None):
+        """Return the current user's pending approvals, newest step entry first.
+
+        Pages are cut with a keyset ``cursor`` on (entered_at, id) instead of
+        an offset. ``etag`` is the token of a previous response: when the
+        user's inbox has not changed since, only ``not_modified`` is returned
+        and the inbox query is not run. A malformed ``cursor`` or ``limit``
+        raises a UserError.
+        """
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise UserError("Invalid inbox limit.")
+        if limit < 1:
+            raise UserError("Invalid inbox limit.")
+        if cursor:
+            entered_at, last_id = self._parse_inbox_cursor(cursor)
+        version = self.env['approval.inbox.version']._get_version(self.env.uid)
+        current_etag = f"{self.env.uid}.{version}.{cursor or ''}.{limit}"
+        if etag and etag == current_etag:
+            return {'not_modified': True, 'etag': current_etag}
+
+        domain = [('approver_ids', 'in', [self.env.uid]), ('status', '=', 'pending')]
+        if cursor:
+            domain += [
+                '|', ('entered_at', '<', entered_at),
+                '&', ('entered_at', '=', entered_at), ('id', '<', last_id),
+            ]
+        requests = self.search(domain, limit=limit, order='entered_at desc, id desc')
+
+        items = [{
+            'id': req.id,
+            'res_model': req.res_model,
+            'res_id': req.res_id,
+            'flow': req.flow_id.name,
+            'step': req.current_step_id.name,
+            'requested_by': req.requested_by.name,
+            'entered_at': fields.Datetime.to_string(req.entered_at),
+        } for req in requests]
+
+        next_cursor = None
+        if len(requests) == limit:
+            next_cursor = f"{items[-1]['entered_at']},{items[-1]['id']}"
+        return {
+            'not_modified': False,
+            'etag': current_etag,
+            'items': items,
+            'next_cursor': next_cursor,
+        }
+
+    @api.model
+    def _parse_inbox_cursor(self, cursor):
+        """Return the (entered_at, id) of an inbox ``cursor``."""
+        try:
+            entered_at, last_id = cursor.rsplit(',', 1)
+            return fields.Datetime.to_datetime(entered_at), int(last_id)
+        except (AttributeError, TypeError, ValueError):
+            raise UserError("Invalid inbox cursor.")
 
     def process_action(self):
         self.ensure_one()
+        with instrumentation.transition(self.env, self.env.context.get('action_type') or 'action', self):
+            return self._process_action()
+
+    def _process_action(self):
+        self._lock_for_transition()
+        idempotency_key = self.env.context.get('idempotency_key')
+        if idempotency_key and self._find_idempotent_history(idempotency_key):
+            _logger.info("Replayed transition %s on approval request %s.", idempotency_key, self.id)
+            return True
+
         if self.auto_process_initiator_step():
             return
 
@@ -44,46 +411,50 @@ class ApprovalRequest(models.Model):
 
         if not action_type:
             raise UserError("Invalid Operation: Action type is not provided.")
-        action = self.env['approval.action'].search([('code', '=', action_type)], limit=1)
-        if not action:
-            raise UserError(f"No approval action found for code '{action_type}'")
+        if self.branches_remaining:
+            return self._process_branch_action(action_type, comment, idempotency_key)
+        with instrumentation.phase('step_resolution'):
+            action = self.env['approval.action'].search([('code', '=', action_type)], limit=1)
+            if not action:
+                raise UserError(f"No approval action found for code '{action_type}'")
 
-        if self.status not in ['pending', 'rejected'] and action_type in ['approve', 'reject']:
-            raise UserError(f"This request cannot be {action_type} in its current state.")
+            if self.status not in ['pending', 'rejected'] and action_type in ['approve', 'reject']:
+                raise UserError(f"This request cannot be {action_type} in its current state.")
 
-        step = self.current_step_id
+            step = self.current_step_id
 
-        if not step:
-            raise UserError("No current step defined.")
+            if not step:
+                raise UserError("No current step defined.")
 
-        approvers = self.approver_ids
+            approvers = self.approver_ids
 
-        # Check if current user is among them
-        if self.env.user not in approvers:
-            raise UserError(f"You are not authorized to perform '{action_type}' on this request.")
-        step_action = step.action_ids.filtered(lambda a: a.action_id.code == action_type)[:1]
+            # Check if current user is among them
+            if self.env.user not in approvers:
+                raise UserError(f"You are not authorized to perform '{action_type}' on this request.")
+            step_action = step.action_ids.filtered(lambda a: a.action_id.code == action_type)[:1]
 
-        if not step_action:
-            raise UserError(f"No '{action_type}' action defined for this step.")
+            if not step_action:
+                raise UserError(f"No '{action_type}' action defined for this step.")
 
-        next_step = step_action.next_step_id
-        if not next_step and not step.condition_ids and step.next_step_ids:
-            for candidate in step.next_step_ids:
-                candidate_checked = self._check_org_chart(candidate)
-                if candidate_checked:
-                    next_step = candidate_checked
-                    break
+            next_step = step_action.next_step_id
+            if not next_step and not step.condition_ids and step.next_step_ids:
+                for candidate in step.next_step_ids:
+                    candidate_checked = self._check_org_chart(candidate)
+                    if candidate_checked:
+                        next_step = candidate_checked
+                        break
         if action_type == 'approve':
             if step.committee_approval:
                 ApprovalHistory = self.env['approval.history']
 
-                approved_count = ApprovalHistory.search_count([
-                    ('request_id', '=', self.id),
-                    ('step_id', '=', step.id),
-                    ('action_id', '=', action.id),
-                ])
+                with instrumentation.phase('step_resolution'):
+                    approved_count = ApprovalHistory.search_count([
+                        ('request_id', '=', self.id),
+                        ('step_id', '=', step.id),
+                        ('action_id', '=', action.id),
+                    ])
 
-                total_approvers = len(step.role_id.users)
+                    total_approvers = len(self.env['res.groups']._get_member_ids(step.role_id.id))
                 if total_approvers == 0:
                     raise UserError("No users found in the approver group for this step.")
 
@@ -91,13 +462,14 @@ class ApprovalRequest(models.Model):
                 required = max(required, 1)
 
                 # Record current user's approval
-                ApprovalHistory.create({
+                self._create_history([{
                     'request_id': self.id,
                     'step_id': step.id,
                     'action_id': action.id,
                     'user_id': self.env.uid,
                     'comment': comment,
-                })
+                    'idempotency_key': idempotency_key,
+                }])
 
                 # Remove current user from approver list immediately
                 if self.env.uid in self.approver_ids.ids:
@@ -132,11 +504,7 @@ class ApprovalRequest(models.Model):
                             'approver_ids': [(6, 0, [self.requested_for_id.id])],
                         })
 
-                        self.activity_schedule(
-                            'mail.mail_activity_data_todo',
-                            user_id=self.requested_for_id.id,
-                            note="This request has been sent to you for review."
-                        )
+                        self._schedule_todo(self.requested_for_id.id, "This request has been sent to you for review.")
 
                     elif next_step:
                         self.write({
@@ -166,17 +534,13 @@ class ApprovalRequest(models.Model):
                         'current_step_id': next_step.id,
                         'approver_ids': [(6, 0, [self.requested_for_id.id])],
                     })
-                    self.activity_schedule(
-                        'mail.mail_activity_data_todo',
-                        user_id=self.requested_for_id.id,
-                        note="This request has been sent to you for review."
-                    )
+                    self._schedule_todo(self.requested_for_id.id, "This request has been sent to you for review.")
                 elif next_step:
                     self.write({'current_step_id': next_step.id})
                     # self._notify_approvers_via_activity(self.approver_ids)
                     self.auto_process_condition_steps(next_step)
         elif action_type == 'amend':
-            initiator_step = self.flow_id.step_ids.filtered(lambda s: s.is_initiator)[:1]
+            initiator_step = self._get_flow_definition().step_ids.filtered(lambda s: s.is_initiator)[:1]
             if not initiator_step:
                 raise UserError("No initiator step defined in this workflow.")
 
@@ -185,14 +549,11 @@ class ApprovalRequest(models.Model):
                 'current_step_id': initiator_step.id,
                 'approver_ids': [(6, 0, [self.requested_by.id])] if self.requested_by else [(5, 0, 0)],
             })
+            self._preresolve_approver_path()
 
             # Notify the requester
             if self.requested_by:
-                self.activity_schedule(
-                    'mail.mail_activity_data_todo',
-                    user_id=self.requested_by.id,
-                    note="Your request has been returned for amendment."
-                )
+                self._schedule_todo(self.requested_by.id, "Your request has been returned for amendment.")
 
         elif action_type == 'reject':
             self.write({
@@ -221,11 +582,7 @@ class ApprovalRequest(models.Model):
             })
 
             # Notify employee
-            self.activity_schedule(
-                'mail.mail_activity_data_todo',
-                user_id=self.requested_for_id.id,
-                note="This request has been sent to you for review."
-            )
+            self._schedule_todo(self.requested_for_id.id, "This request has been sent to you for review.")
 
 
         elif action_type in ['revert']:
@@ -234,164 +591,707 @@ class ApprovalRequest(models.Model):
                 'current_step_id': next_step.id if next_step else step.id,
             })
 
-        self.env['approval.history'].create({
+        self._create_history([{
             'request_id': self.id,
             'step_id': step.id,
             'action_id': action.id,  # still points to approval.action
             'user_id': self.env.uid,
             'comment': comment,
-        })
+            'idempotency_key': idempotency_key,
+        }])
 
         self._complete_user_activity()
 
-    def auto_process_initiator_step(self):
-        self.ensure_one()
-        step = self.current_step_id
-
-        if not step or not step.is_initiator:
-            return False
-
-        next_step = None
-
-        # ✅ Handle conditional branches
-        if step.is_condition:
-            for condition in step.condition_ids:
-                if condition._evaluate_condition(self):
-                    next_step = condition.next_step_id
-                    break
-
-        # ✅ Default to first defined action transition
-        if not next_step and step.action_ids:
-            next_step = step.action_ids[0].next_step_id
+    def _process_branch_action(self, action_type, comment, idempotency_key):
+        """Run ``action_type`` on the pending branch of the current user
+        (``branch_id`` in the context picks one when they approve several).
 
-        # ✅ Check org chart candidates
-        if not next_step and step.next_step_ids:
-            for candidate in step.next_step_ids:
-                candidate_checked = self._check_org_chart(candidate)
-                if candidate_checked:
-                    next_step = candidate_checked
-                    break
-
-        if not next_step:
-            raise UserError("Unable to determine the next step from initiator.")
-
-        next_step = self._check_org_chart(next_step)
+        Approving moves the branch on, see ``_advance_branch``. Rejecting or
+        amending cancels all the branches of the request.
+        """
+        with instrumentation.phase('step_resolution'):
+            action = self.env['approval.action'].search([('code', '=', action_type)], limit=1)
+            if not action:
+                raise UserError(f"No approval action found for code '{action_type}'")
 
-        # ✅ Mark initiator step as completed
-        if step.id not in self.completed_step_ids.ids:
-            self.write({'completed_step_ids': [(4, step.id)]})
+            branches = self.branch_ids.filtered(lambda b: b.state == 'pending' and self.env.user in b.approver_ids)
+            if self.env.context.get('branch_id'):
+                branches = branches.filtered(lambda b: b.id == self.env.context['branch_id'])
+            branch = branches[:1]
+            if not branch:
+                raise UserError(f"You are not authorized to perform '{action_type}' on this request.")
 
-        # ✅ Get global action for "auto_initiate"
-        action = self.env['approval.action'].search([('code', '=', 'auto_initiate')], limit=1)
-        if not action:
-            raise UserError("Global action 'auto_initiate' is not defined. Please create it in Approval Actions.")
+            step = branch.step_id
+            step_action = step.action_ids.filtered(lambda a: a.action_id.code == action_type)[:1]
+            if not step_action:
+                raise UserError(f"No '{action_type}' action defined for this step.")
 
-        # ✅ Record history with proper action_id
-        self.env['approval.history'].create({
+        history_vals = {
             'request_id': self.id,
             'step_id': step.id,
+            'action_id': action.id,
             'user_id': self.env.uid,
-            'action_id': action.id,  # Proper M2O reference
-            'comment': 'Automatically advanced from initiator step.',
-        })
+            'comment': comment,
+            'idempotency_key': idempotency_key,
+        }
+        if action_type == 'approve':
+            if step.committee_approval:
+                with instrumentation.phase('step_resolution'):
+                    approved_count = self.env['approval.history'].search_count([
+                        ('request_id', '=', self.id),
+                        ('step_id', '=', step.id),
+                        ('action_id', '=', action.id),
+                    ])
+                    total_approvers = len(self.env['res.groups']._get_member_ids(step.role_id.id))
+                if total_approvers == 0:
+                    raise UserError("No users found in the approver group for this step.")
+                required = max(round((step.required_approval_percent / 100.0) * total_approvers), 1)
+                if approved_count + 1 < required:
+                    branch.sudo().write({'approver_ids': [(3, self.env.uid)]})
+                    self.write({'approver_ids': [(6, 0, self._get_branch_approvers().ids)]})
+                    self._create_history([history_vals])
+                    self._complete_user_activity()
+                    return True
+
+            with instrumentation.phase('step_resolution'):
+                next_step = step_action.next_step_id
+                if not next_step and not step.condition_ids and step.next_step_ids:
+                    for candidate in step.next_step_ids:
+                        candidate_checked = self._check_org_chart(candidate)
+                        if candidate_checked:
+                            next_step = candidate_checked
+                            break
+            self._create_history([history_vals])
+            self._advance_branch(branch, next_step)
+
+        elif action_type in ('reject', 'amend'):
+            self.branch_ids.filtered(lambda b: b.state == 'pending').sudo().write({'state': 'cancelled'})
+            if action_type == 'reject':
+                self.write({
+                    'status': 'rejected',
+                    'rejected_date': fields.Datetime.now(),
+                    'branches_remaining': 0,
+                    'approver_ids': [(3, self.env.uid)],
+                })
+            else:
+                initiator_step = self._get_flow_definition().step_ids.filtered(lambda s: s.is_initiator)[:1]
+                if not initiator_step:
+                    raise UserError("No initiator step defined in this workflow.")
+                self.write({
+                    'status': 'pending',
+                    'current_step_id': initiator_step.id,
+                    'branches_remaining': 0,
+                    'approver_ids': [(6, 0, [self.requested_by.id])] if self.requested_by else [(5, 0, 0)],
+                })
+                self._preresolve_approver_path()
+                if self.requested_by:
+                    self._schedule_todo(self.requested_by.id, "Your request has been returned for amendment.")
+            self._create_history([history_vals])
+
+        else:
+            raise UserError(f"Action '{action_type}' is not available while the request waits for parallel branches.")
+
         self._complete_user_activity()
+        return True
 
-        # ✅ Handle final step
-        if next_step and next_step.is_final:
-            self.write({
-                'status': 'approved',
-                'approved_date': fields.Datetime.now(),
-                'current_step_id': next_step.id,
-                'approver_ids': [(6, 0, [])],
-            })
-            self.write({'completed_step_ids': [(4, next_step.id)]})
-        elif next_step.is_employee_step:
-            if not self.requested_for_id:
-                raise UserError("No 'Requested For' employee defined for this request.")
+    def _advance_branch(self, branch, next_step):
+        """Move ``branch`` to ``next_step``. A branch reaching the join step
+        of its split is done and decrements the request's branch counter;
+        at zero, the other branches are cancelled and the request moves on
+        to the join step."""
+        split_step = branch.split_step_id
+        join_step = split_step.join_step_id
+        if not next_step:
+            raise UserError(f"No next step defined after step '{branch.step_id.name}'.")
+
+        plan = self._plan_route(next_step, stop_at=join_step)
+        if plan['passed']:
+            condition_action = self._get_system_action('auto_condition')
+            self._create_history([{
+                'request_id': self.id,
+                'step_id': step_id,
+                'user_id': self.env.uid,
+                'action_id': condition_action.id,
+                'comment': 'Automatically advanced via conditional logic.',
+            } for step_id in plan['passed']])
+        completed = [(4, step_id) for step_id in [branch.step_id.id, *plan['completed']]]
+
+        if plan['step'] != join_step:
+            self._check_branch_plan(split_step, plan)
+            branch_vals = {'step_id': plan['step'].id}
+            if plan['approvers'] is not None:
+                branch_vals['approver_ids'] = [(6, 0, plan['approvers'].ids)]
+            branch.sudo().write(branch_vals)
+            self.write({'completed_step_ids': completed, 'approver_ids': [(6, 0, self._get_branch_approvers().ids)]})
+            return
+
+        branch.sudo().write({'state': 'done', 'step_id': join_step.id, 'done_date': fields.Datetime.now()})
+        if self.branches_remaining > 1:
             self.write({
-                'status': 'pending',
-                'current_step_id': next_step.id,
-                'approver_ids': [(6, 0, [self.requested_for_id.id])],
+                'branches_remaining': self.branches_remaining - 1,
+                'completed_step_ids': completed,
+                'approver_ids': [(6, 0, self._get_branch_approvers().ids)],
             })
-        else:
-            self.write({'current_step_id': next_step.id})
-            self.auto_process_condition_steps(next_step)
+            return
 
-        return True
+        self.branch_ids.filtered(lambda b: b.state == 'pending').sudo().write({'state': 'cancelled'})
+        self.write({'branches_remaining': 0, 'completed_step_ids': completed + [(4, split_step.id)]})
+        self._apply_routes({self: self._plan_route(join_step)})
 
-    def auto_process_condition_steps(self, step):
+    def _get_branch_approvers(self):
         self.ensure_one()
-        visited = set()
+        return self.branch_ids.filtered(lambda b: b.state == 'pending').approver_ids
+
+    @api.model
+    def process_decisions(self, decisions):
+        """Run a list of decisions through ``process_action``.
+
+        Each decision is a dict with ``request_id`` (or ``res_model`` and
+        ``res_id``), ``action`` (an approval action code) and optional
+        ``comment`` and ``idempotency_key``. A decision whose key was already
+        applied to the request is not run again and reports the current
+        state with ``replayed``. Every decision runs in its own savepoint, so
+        a failing one (user, validation, access or integrity error) is
+        reported in its result and does not undo the others. Concurrency
+        errors are not caught and make the caller retry the whole batch,
+        which the keys make safe. Returns one result dict per decision, in
+        the same order.
+        """
+        requests_by_key = self._find_decision_requests(decisions)
+        self.browse({req.id for req in requests_by_key.values()})._prefetch_flow_structure()
+
+        results = []
+        for index, decision in enumerate(decisions):
+            result = {'index': index, 'success': False}
+            results.append(result)
+
+            key = self._decision_key(decision)
+            if key is False:
+                result['error'] = 'Invalid request reference'
+                continue
+            req = requests_by_key.get(key)
+            if not req:
+                result['error'] = 'Request not found'
+                continue
+            result['request_id'] = req.id
+            if not decision.get('action'):
+                result['error'] = 'Action type is not provided'
+                continue
 
-        while step and step.is_condition:
-            if step.id in visited:
-                raise UserError(f"Workflow loop detected at step {step.name}")
-            visited.add(step.id)
+            idempotency_key = decision.get('idempotency_key')
+            req._lock_for_transition()
+            if idempotency_key and req._find_idempotent_history(idempotency_key):
+                result.update({'success': True, 'status': req.status, 'replayed': True})
+                continue
 
-            # ✅ Evaluate conditions
-            next_step = None
-            for condition in step.condition_ids:
-                if condition._evaluate_condition(self):
-                    next_step = condition.next_step_id
-                    break
+            try:
+                with self.env.cr.savepoint():
+                    req.with_context(
+                        action_type=decision['action'],
+                        comment=decision.get('comment') or '',
+                        idempotency_key=idempotency_key,
+                    ).process_action()
+            except (UserError, ValidationError, AccessError) as e:
+                result['error'] = str(e)
+                continue
+            except IntegrityError as e:
+                _logger.info("Decision %s on approval request %s violates a constraint: %s", index, req.id, e)
+                result['error'] = 'The decision conflicts with the current data'
+                continue
+            result.update({'success': True, 'status': req.status})
+        return results
+
+    def _lock_for_transition(self):
+        """Serialize transitions on these requests with transaction-level
+        advisory locks, taken in id order to avoid deadlocks.
+
+        The snapshot of the transaction usually predates the lock, so a
+        transaction that waited on it does not see what the holder
+        committed: its writes then fail with a concurrency error (see
+        ``_create_history``) and the transaction must be retried.
+        """
+        if self.ids:
+            self.env.cr.execute(
+                "SELECT pg_advisory_xact_lock(%s, id) FROM unnest(%s) AS id ORDER BY id",
+                [TRANSITION_LOCK_NAMESPACE, sorted(self.ids)],
+            )
 
-            if not next_step:
-                raise UserError(f"No matching condition found for step: {step.name}")
+    def _find_idempotent_history(self, idempotency_key):
+        self.ensure_one()
+        return self.env['approval.history'].sudo().search([
+            ('request_id', '=', self.id),
+            ('idempotency_key', '=', idempotency_key),
+        ], limit=1)
+
+    @api.model
+    def _decision_key(self, decision):
+        """Return the request id or (res_model, res_id) a decision targets,
+        None when it names no request and False when its reference is
+        malformed."""
+        if not isinstance(decision, dict):
+            return None
+        try:
+            if decision.get('request_id'):
+                return int(decision['request_id'])
+            if decision.get('res_model') and decision.get('res_id'):
+                if not isinstance(decision['res_model'], str):
+                    return False
+                return (decision['res_model'], int(decision['res_id']))
+        except (ValueError, TypeError):
+            return False
+        return None
+
+    @api.model
+    def _find_decision_requests(self, decisions):
+        """Map decision keys to requests with one search per target model.
+
+        When a document has several requests, the pending one wins, then the
+        most recent one.
+        """
+        request_ids = set()
+        res_ids_by_model = defaultdict(set)
+        for decision in decisions:
+            key = self._decision_key(decision)
+            if isinstance(key, int):
+                request_ids.add(key)
+            elif key:
+                res_ids_by_model[key[0]].add(key[1])
+
+        requests_by_key = {}
+        for req in self.browse(request_ids).exists():
+            requests_by_key[req.id] = req
+        for res_model, res_ids in res_ids_by_model.items():
+            candidates = self.search([
+                ('res_model', '=', res_model),
+                ('res_id', 'in', list(res_ids)),
+            ], order='id desc')
+            for req in candidates:
+                key = (res_model, req.res_id)
+                current = requests_by_key.get(key)
+                if not current or (current.status != 'pending' and req.status == 'pending'):
+                    requests_by_key[key] = req
+        return requests_by_key
+
+    @api.model
+    def create_for_documents(self, flow, records, module_name=None, vals=None, request_type=None):
+        """Create one approval request per record of ``records`` and route them.
+
+        All requests are created with a single ``create`` and advanced from
+        the initiator step as one batch. ``vals`` is merged into every
+        request; it may also be a callable returning the values for a given
+        record (branch, requested for, ...). Without ``flow``, the flow of
+        every record is resolved with ``approval.flow.resolve_flows``.
+        """
+        if not records:
+            return self.browse()
+        if not flow:
+            flows = self.env['approval.flow'].resolve_flows(records, request_type)
+            missing = records.filtered(lambda r: r.id not in flows)
+            if missing:
+                raise UserError(
+                    f"No approval flow found for {', '.join(missing.mapped('display_name'))}."
+                )
+            records_by_flow = defaultdict(list)
+            for record in records:
+                records_by_flow[flows[record.id]].append(record.id)
+            requests = self.browse()
+            for resolved_flow, record_ids in records_by_flow.items():
+                requests |= self.create_for_documents(
+                    resolved_flow, records.browse(record_ids), module_name=module_name, vals=vals,
+                )
+            return requests
+        initiator_step = flow.step_ids.filtered(lambda s: s.is_initiator)[:1]
+        if not initiator_step:
+            raise UserError("No initiator step defined in this workflow.")
+
+        vals_list = []
+        for record in records:
+            extra_vals = vals(record) if callable(vals) else (vals or {})
+            vals_list.append({
+                'flow_id': flow.id,
+                'res_model': records._name,
+                'res_id': record.id,
+                'module_name': module_name or records._original_module,
+                'current_step_id': initiator_step.id,
+                **extra_vals,
+            })
 
-            # ✅ Mark step as completed
-            if step.id not in self.completed_step_ids.ids:
-                self.write({'completed_step_ids': [(4, step.id)]})
+        requests = self.with_context(mail_create_nolog=True).create(vals_list)
+        requests._auto_process_initiator_steps()
+        return self.browse(requests.ids)
+
+    @api.model
+    def simulate_routing(self, flow, domain=None, vals=None, requester=None, batch_size=1000, with_paths=True):
+        """Dry-run the routing of ``flow`` for the documents of its model
+        matching ``domain``, without creating or writing anything.
+
+        Every document is routed from the initiator step through the
+        conditions, org chart and delegations as if ``requester`` (the
+        current user by default) had submitted it; ``vals`` is applied to
+        the simulated requests like in ``create_for_documents``. Documents
+        are processed ``batch_size`` at a time, each batch sharing one
+        prefetch of its target records and one org-chart cache.
+
+        Returns ``routes``, the distinct outcomes with their document count,
+        ``errors``, the count of documents per routing error and, with
+        ``with_paths``, ``paths``: {document id: outcome or error}.
+        """
+        source_model = flow.request_model_id.model
+        initiator = flow.step_ids.filtered(lambda s: s.is_initiator)[:1]
+        if not initiator:
+            raise UserError("No initiator step defined in this workflow.")
+        requester = requester or self.env.user
+        Source = self.env[source_model]
+        document_ids = Source.search(domain or [], order='id').ids
+
+        steps = flow.step_ids
+        steps.mapped('condition_ids.next_step_id')
+        steps.mapped('action_ids.next_step_id')
+        steps.mapped('next_step_ids')
+        step_names = {step.id: step.name for step in steps}
+
+        org_cache = {}
+        routes = defaultdict(int)
+        errors = defaultdict(int)
+        paths = {}
+        for start in range(0, len(document_ids), batch_size):
+            documents = Source.browse(document_ids[start:start + batch_size])
+            for document in documents:
+                extra_vals = vals(document) if callable(vals) else (vals or {})
+                req = self.new({
+                    'flow_id': flow.id,
+                    'res_model': source_model,
+                    'res_id': document.id,
+                    'module_name': 'simulation',
+                    'current_step_id': initiator.id,
+                    'create_uid': requester.id,
+                    'requested_by': requester.id,
+                    **extra_vals,
+                })
+                try:
+                    next_step = req._get_initiator_next_step(initiator, org_cache, document)
+                    if not next_step:
+                        raise UserError("Unable to determine the next step from initiator.")
+                    plan = req._plan_route(next_step, org_cache, document)
+                except UserError as e:
+                    errors[str(e)] += 1
+                    if with_paths:
+                        paths[document.id] = {'error': str(e)}
+                    continue
+
+                path = (initiator.id, *plan['passed'], plan['step'].id)
+                approver_ids = tuple(sorted(plan['approvers'].ids)) if plan['approvers'] is not None else ()
+                status = plan['status'] or 'pending'
+                routes[(path, approver_ids, status)] += 1
+                if with_paths:
+                    paths[document.id] = {'path': list(path), 'approver_ids': list(approver_ids), 'status': status}
+
+            # Keep memory flat: drop the batch's documents and simulated requests
+            Source.invalidate_model()
+            self.invalidate_model()
+
+        result = {
+            'documents': len(document_ids),
+            'routes': [{
+                'path': list(path),
+                'path_names': [step_names.get(step_id, str(step_id)) for step_id in path],
+                'approver_ids': list(approver_ids),
+                'status': status,
+                'count': count,
+            } for (path, approver_ids, status), count in sorted(routes.items(), key=lambda item: -item[1])],
+            'errors': dict(errors),
+        }
+        if with_paths:
+            result['paths'] = paths
+        return result
 
-            # ✅ Get global action for "auto_condition"
-            action = self.env['approval.action'].search([('code', '=', 'auto_condition')], limit=1)
-            if not action:
-                raise UserError("Global action 'auto_condition' is not defined. Please create it in Approval Actions.")
+    def auto_process_initiator_step(self):
+        self.ensure_one()
+        return bool(self._auto_process_initiator_steps())
+
+    def _auto_process_initiator_steps(self):
+        """Advance every request of ``self`` sitting on an initiator step.
+
+        Conditions, org chart and delegations are resolved with caches shared
+        by the whole batch, and the outcome is written with one history
+        ``create`` and one ``write`` per distinct route.
+        """
+        requests = self.filtered(lambda r: r.current_step_id.is_initiator)
+        if not requests:
+            return requests
+        with instrumentation.transition(self.env, 'auto_initiate', requests):
+            requests._advance_initiator_steps()
+        return requests
+
+    def _advance_initiator_steps(self):
+        action = self._get_system_action('auto_initiate')
+        self._prefetch_flow_structure()
+        targets = self._get_target_records()
+        org_cache = {}
+
+        # The key identifies one submission, so it only applies to a single request
+        idempotency_key = self.env.context.get('idempotency_key') if len(self) == 1 else False
+        plans = {}
+        history_vals = []
+        for req in self:
+            step = req.current_step_id
+            target = targets.get(req.id)
+            next_step = req._get_initiator_next_step(step, org_cache, target)
+            if not next_step:
+                raise UserError("Unable to determine the next step from initiator.")
 
-            # ✅ Record history with proper action_id
-            self.env['approval.history'].create({
-                'request_id': self.id,
+            plan = req._plan_route(next_step, org_cache, target)
+            plan['completed'].insert(0, step.id)
+            plans[req] = plan
+            history_vals.append({
+                'request_id': req.id,
                 'step_id': step.id,
                 'user_id': self.env.uid,
                 'action_id': action.id,
-                'comment': 'Automatically advanced via conditional logic.',
+                'comment': 'Automatically advanced from initiator step.',
+                'idempotency_key': idempotency_key,
             })
-            self._complete_user_activity()
 
-            # ✅ If final step reached → approve request
-            if next_step.is_final:
-                if next_step.id not in self.completed_step_ids.ids:
-                    self.write({'completed_step_ids': [(4, next_step.id)]})
-                self.write({
-                    'status': 'approved',
-                    'approved_date': fields.Datetime.now(),
-                    'current_step_id': next_step.id,
-                    'approver_ids': [(6, 0, [])],
-                })
-                return
-            elif next_step.is_employee_step:
-                if not self.requested_for_id:
-                    raise UserError("No 'Requested For' employee defined for this request.")
-                self.write({
-                    'status': 'pending',
-                    'current_step_id': next_step.id,
-                    'approver_ids': [(6, 0, [self.requested_for_id.id])],
-                })
-                self.activity_schedule(
-                    'mail.mail_activity_data_todo',
-                    user_id=self.requested_for_id.id,
-                    note="This request has been sent to you for review."
-                )
+        self._complete_user_activity()
+        self._apply_routes(plans, history_vals)
+
+    def _get_initiator_next_step(self, step, org_cache=None, target=None):
+        """Pick the step following the initiator ``step``: first matching
+        condition, then the first action transition, then the first next
+        step the org chart accepts."""
+        self.ensure_one()
+        if step.is_condition:
+            next_step = self._match_condition(step, target)
+            if next_step:
+                return next_step
 
-            # ✅ Otherwise move forward
-            self.write({'current_step_id': next_step.id})
-            step = next_step  # Continue loop
+        if step.action_ids and step.action_ids[0].next_step_id:
+            return step.action_ids[0].next_step_id
 
-        # ✅ Handle organization chart step if it's not a condition
-        if step and not step.is_condition:
-            step = self._check_org_chart(step)
-            if not step:
-                return
-            self.write({'current_step_id': step.id})
+        for candidate in step.next_step_ids:
+            candidate_checked = self._resolve_org_chart(candidate, org_cache)[0]
+            if candidate_checked:
+                return candidate_checked
+        return self.env['approval.step']
+
+    def auto_process_condition_steps(self, step):
+        self.ensure_one()
+        with instrumentation.transition(self.env, 'auto_condition', self):
+            self._apply_routes({self: self._plan_route(step)})
+
+    def _plan_route(self, step, org_cache=None, target=None, stop_at=None):
+        """Follow condition steps from ``step`` and return where the request lands.
+
+        Nothing is written here. The plan holds the condition steps passed,
+        the steps to mark completed, the landing step, the approvers to
+        assign (None keeps the current ones) and the new status, if any.
+        A parallel split also plans its ``branches`` (landing step and
+        approvers of each) and the number of them still ``remaining``.
+        Routing stops without resolving approvers on reaching ``stop_at``.
+        """
+        self.ensure_one()
+        passed = []
+        while step and step.is_condition and step != stop_at:
+            if step.id in passed:
+                raise UserError(f"Workflow loop detected at step {step.name}")
+            passed.append(step.id)
+
+            next_step = self._match_condition(step, target)
+            if not next_step:
+                raise UserError(f"No matching condition found for step: {step.name}")
+            step = next_step
+
+        plan = {
+            'passed': passed,
+            'completed': list(passed),
+            'step': step,
+            'approvers': None,
+            'status': None,
+            'notify': False,
+        }
+        if stop_at and step == stop_at:
+            return plan
+        if step.is_parallel_split:
+            return self._plan_split(step, plan, org_cache, target)
+        if step.is_final:
+            plan['completed'].append(step.id)
+            plan.update(approvers=self.env['res.users'], status='approved')
+        elif step.is_employee_step:
+            if not self.requested_for_id:
+                raise UserError("No 'Requested For' employee defined for this request.")
+            plan.update(approvers=self.requested_for_id, status='pending', notify=bool(passed))
+        else:
+            plan['step'], plan['approvers'] = self._resolve_org_chart(step, org_cache)
+        return plan
+
+    def _plan_split(self, step, plan, org_cache=None, target=None):
+        """Complete ``plan``, landing on the parallel ``step``, with one
+        branch per next step. Branches whose conditions lead straight to
+        the join step count as done; when they are enough, the request
+        goes on to the join step right away. Branch approvers are always
+        recordsets, the current approvers standing in for unresolved ones."""
+        join_step = step.join_step_id
+        branches = []
+        done = 0
+        for branch_step in step.next_step_ids:
+            branch_plan = self._plan_route(branch_step, org_cache, target, stop_at=join_step)
+            plan['passed'] += branch_plan['passed']
+            plan['completed'] += branch_plan['completed']
+            if branch_plan['step'] == join_step:
+                done += 1
+                continue
+            self._check_branch_plan(step, branch_plan)
+            approvers = branch_plan['approvers']
+            if approvers is None:
+                # no org chart for the creator: the branch keeps the current approvers
+                approvers = self.approver_ids
+            branches.append((branch_plan['step'], approvers))
+
+        required = min(step.required_branches or len(step.next_step_ids), len(step.next_step_ids))
+        if done >= required:
+            join_plan = self._plan_route(join_step, org_cache, target)
+            join_plan['passed'] = plan['passed'] + join_plan['passed']
+            join_plan['completed'] = plan['completed'] + [step.id] + join_plan['completed']
+            return join_plan
+        plan.update(
+            approvers=self.env['res.users'].union(*(approvers for __, approvers in branches)),
+            status='pending',
+            branches=branches,
+            remaining=required - done,
+        )
+        return plan
+
+    def _check_branch_plan(self, split_step, plan):
+        if plan['status'] == 'approved' or plan.get('branches'):
+            raise UserError(
+                f"Branches of parallel step '{split_step.name}' must lead to step "
+                f"'{split_step.join_step_id.name}' and cannot split again."
+            )
+
+    def _match_condition(self, step, target=None):
+        """Return the next step of the first condition of ``step`` that
+        holds for this request, or None."""
+        with instrumentation.phase('conditions'):
+            for condition in step.condition_ids:
+                with tracing.span('condition', request_id=self.id, step_id=step.id, condition_id=condition.id,
+                                  field=condition.field_to_check, operator=condition.operator) as span:
+                    matched = condition._evaluate_condition(self, target)
+                    span.set(matched=bool(matched))
+                if matched:
+                    return condition.next_step_id
+        return None
+
+    def _apply_routes(self, plans, history_vals=None):
+        """Write the routing ``plans`` ({request: plan}) built by ``_plan_route``.
+
+        History rows are created at once and requests sharing the same
+        outcome are updated with a single ``write``.
+        """
+        history_vals = list(history_vals or [])
+        condition_action = None
+        groups = defaultdict(list)
+        to_notify = self.browse()
+        branch_vals = []
+
+        for req, plan in plans.items():
+            if plan['passed'] and not condition_action:
+                condition_action = self._get_system_action('auto_condition')
+            for step_id in plan['passed']:
+                history_vals.append({
+                    'request_id': req.id,
+                    'step_id': step_id,
+                    'user_id': self.env.uid,
+                    'action_id': condition_action.id,
+                    'comment': 'Automatically advanced via conditional logic.',
+                })
+            approvers = plan['approvers']
+            key = (
+                tuple(plan['completed']),
+                plan['step'].id,
+                tuple(approvers.ids) if approvers is not None else None,
+                plan['status'],
+                plan.get('remaining'),
+            )
+            groups[key].append(req.id)
+            if plan['notify']:
+                to_notify |= req
+            branch_vals += [{
+                'request_id': req.id,
+                'split_step_id': plan['step'].id,
+                'step_id': branch_step.id,
+                'approver_ids': [(6, 0, approvers.ids)],
+            } for branch_step, approvers in plan.get('branches', ())]
+
+        if history_vals:
+            self._create_history(history_vals)
+
+        now = fields.Datetime.now()
+        for (completed_ids, step_id, approver_ids, status, remaining), request_ids in groups.items():
+            vals = {'current_step_id': step_id}
+            if remaining is not None:
+                vals['branches_remaining'] = remaining
+            if completed_ids:
+                vals['completed_step_ids'] = [(4, completed_id) for completed_id in completed_ids]
+            if approver_ids is not None:
+                vals['approver_ids'] = [(6, 0, list(approver_ids))]
+            if status == 'approved':
+                vals.update({'status': 'approved', 'approved_date': now})
+            elif status:
+                vals['status'] = status
+            self.browse(request_ids).write(vals)
+        if branch_vals:
+            branches = self.env['approval.request.branch'].sudo().create(branch_vals)
+            instrumentation.add_rows(len(branches))
+
+        if to_notify:
+            to_notify._notify_approvers_via_activity(message="This request has been sent to you for review.")
+
+    def _create_history(self, vals_list):
+        with instrumentation.phase('history'):
+            try:
+                history = self.env['approval.history'].create(vals_list)
+            except errors.UniqueViolation as e:
+                if e.diag.constraint_name != IDEMPOTENCY_CONSTRAINT:
+                    raise
+                # the same transition was committed after our snapshot
+                raise TransitionConflict(
+                    f"Transition {self.env.context.get('idempotency_key')} was applied concurrently."
+                ) from e
+            instrumentation.add_rows(len(history))
+        return history
+
+    def _get_system_action(self, code):
+        action = self.env['approval.action'].search([('code', '=', code)], limit=1)
+        if not action:
+            raise UserError(f"Global action '{code}' is not defined. Please create it in Approval Actions.")
+        return action
+
+    def _prefetch_flow_structure(self):
+        """Load the steps, conditions, transitions and roles of the flows of
+        ``self`` in a few batched reads instead of one query per record."""
+        steps = self.mapped('flow_version_id.step_ids') | self.filtered(lambda r: not r.flow_version_id).mapped('flow_id.step_ids')
+        steps.mapped('condition_ids.next_step_id')
+        steps.mapped('action_ids.action_id.code')
+        steps.mapped('action_ids.next_step_id')
+        steps.mapped('next_step_ids')
+
+    def _group_by_model(self):
+        """Return {model name: [requests]} for the installed target models."""
+        by_model = defaultdict(list)
+        for req in self:
+            if req.res_model in self.env:
+                by_model[req.res_model].append(req)
+        return by_model
+
+    def _get_target_records(self):
+        """Return {request id: target record}. Targets are browsed per model
+        so that reading their fields is prefetched for the whole batch."""
+        targets = {}
+        for model_name, reqs in self._group_by_model().items():
+            records = self.env[model_name].browse([req.res_id for req in reqs])
+            for req, record in zip(reqs, records):
+                targets[req.id] = record
+        return targets
 
     def action_open_target_record(self):
         self.ensure_one()
@@ -434,11 +1334,12 @@ class ApprovalRequest(models.Model):
 
     def _compute_step_progress(self):
         for rec in self:
-            if not rec.flow_id or not rec.flow_id.step_ids:
+            definition = rec._get_flow_definition()
+            if not definition or not definition.step_ids:
                 rec.step_progress = "<span>No steps defined.</span>"
                 continue
 
-            steps = rec.flow_id.step_ids.sorted(key=lambda s: s.sequence)
+            steps = definition._get_ordered_steps()
             completed_ids = set(rec.completed_step_ids.ids)
             current_step = rec.current_step_id
             current_id = current_step.id if current_step else None
@@ -518,7 +1419,7 @@ class ApprovalRequest(models.Model):
             employees = self.env['hr.employee'].sudo().search([('job_id', '=', job.id)])
             for employee in employees:
                 user = employee.user_id
-                user_groups = user.groups_id if user else self.env['res.groups'].browse()
+                user_groups = self.env['res.groups'].browse(sorted(user._get_group_ids(user.id))) if user else self.env['res.groups']
                 hierarchy_data.append({
                     'job': job,
                     'employee': employee,
@@ -528,215 +1429,378 @@ class ApprovalRequest(models.Model):
             job = job.parent_id
         return hierarchy_data
 
-    def _check_org_chart(self, step):
+    def _check_org_chart(self, step, org_cache=None):
         self.ensure_one()
+        if step and step.is_parallel_split:
+            # branch approvers are resolved when the split is routed
+            return step
+        step, approvers = self._resolve_org_chart(step, org_cache)
+        if approvers is not None:
+            self.approver_ids = approvers
+        return step
+
+    def _resolve_org_chart(self, step, org_cache=None, use_path=True):
+        """Return ``(step, approvers)`` for the request reaching ``step``.
+
+        Nothing is written. ``approvers`` is None when the creator has no
+        employee record, in which case the current approvers are kept.
+        ``org_cache`` can be shared by the requests of a batch so creator
+        hierarchies and delegations are resolved only once. With
+        ``use_path``, the pre-resolved approver path is used when it has
+        the step.
+        """
+        self.ensure_one()
+        org_cache = {} if org_cache is None else org_cache
+
+        with instrumentation.phase('org_chart'):
+            stored = self._get_path_approvers(step, org_cache) if use_path and step else None
+            if stored is not None:
+                return stored
+            try:
+                employee, hierarchy_users = self._get_org_hierarchy(org_cache)
+                if not employee:
+                    _logger.warning(f"No employee record found for user {self.create_uid.id}")
+                    return step, None
+                if not step:
+                    raise UserError("No valid steps found. Workflow cannot continue.")
+                return self._resolve_org_step(step, employee, hierarchy_users, org_cache)
+
+            except Exception as e:
+                _logger.error(f"Error in _check_org_chart for request {self.id}: {str(e)}", exc_info=True)
+                raise UserError(f"Workflow error: {str(e)}")
+
+    @api.model
+    def _get_approver_path_stamp(self, org_cache=None):
+        """Token of the data approver paths are resolved from: the sequence
+        bumped on group and delegation changes, the day (delegations are
+        dated) and the last change of the HR org chart when it exists.
+
+        Read once per ``org_cache``; the maxima come from the write_date
+        indexes of the HR tables, so no query scans a table.
+        """
+        if org_cache is not None and 'path_stamp' in org_cache:
+            return org_cache['path_stamp']
+        if 'hr.employee' in self.env and 'hr.job' in self.env:
+            self.env['hr.employee'].flush_model(['write_date'])
+            self.env['hr.job'].flush_model(['write_date'])
+            self.env.cr.execute(f"""
+                SELECT last_value,
+                       GREATEST((SELECT MAX(write_date) FROM hr_employee),
+                                (SELECT MAX(write_date) FROM hr_job))
+                  FROM {APPROVER_PATH_SEQUENCE}
+            """)
+        else:
+            self.env.cr.execute(f"SELECT last_value, NULL FROM {APPROVER_PATH_SEQUENCE}")
+        version, org_changed = self.env.cr.fetchone()
+        stamp = f"{version}:{fields.Date.today()}:{org_changed or ''}"
+        if org_cache is not None:
+            org_cache['path_stamp'] = stamp
+        return stamp
+
+    @api.model
+    def _invalidate_approver_paths(self):
+        """Mark every pre-resolved approver path stale; each one is resolved
+        again the next time a transition of its request needs it.
+
+        Sequences are not transactional and lock no row, so concurrent
+        changes do not wait on each other. The sequence is bumped now, for
+        this transaction, and again after commit, so paths that concurrent
+        transactions resolved from the data before the change are stale too.
+        """
+        cr = self.env.cr
+        cr.execute("SELECT nextval(%s)", [APPROVER_PATH_SEQUENCE])
+        if APPROVER_PATH_SEQUENCE in cr.postcommit.data:
+            return
+        cr.postcommit.data[APPROVER_PATH_SEQUENCE] = True
+
+        @cr.postcommit.add
+        def bump_after_commit():
+            cr.postcommit.data.pop(APPROVER_PATH_SEQUENCE, None)
+            cr.execute("SELECT nextval(%s)", [APPROVER_PATH_SEQUENCE])
+
+    def _preresolve_approver_path(self, org_cache=None):
+        """Resolve and store the approvers of the remaining steps of the
+        requests whose flow pre-resolves approvers.
+
+        Every step is resolved, completed ones included, so the path still
+        holds after an amendment. Structural steps (initiator, final,
+        condition, parallel split) and employee steps need no resolution.
+        Steps that cannot be resolved yet are left out and resolved when
+        the request reaches them. Requests ending up with the same path are
+        written together.
+        """
+        org_cache = {} if org_cache is None else org_cache
+        requests = self.filtered(lambda r: r.flow_id.preresolve_approvers)
+        if not requests:
+            return
+        stamp = self._get_approver_path_stamp(org_cache)
+        by_path = defaultdict(list)
+        for req in requests:
+            steps = {}
+            for step in req._get_flow_definition()._get_ordered_steps():
+                if (step.is_initiator or step.is_final or step.is_condition
+                        or step.is_parallel_split or step.is_employee_step):
+                    continue
+                try:
+                    landed, approvers = req._resolve_org_chart(step, org_cache, use_path=False)
+                except UserError:
+                    continue
+                if approvers is not None:
+                    steps[str(step.id)] = [landed.id, approvers.ids]
+            by_path[json.dumps(steps, sort_keys=True)].append(req.id)
+        for steps, request_ids in by_path.items():
+            self.browse(request_ids).write({'approver_path': {'stamp': stamp, 'steps': json.loads(steps)}})
+
+    def _get_path_approvers(self, step, org_cache=None):
+        """``(step, approvers)`` of ``step`` from the pre-resolved path, or
+        None. A path older than the data it was resolved from is resolved
+        again first."""
+        path = self.approver_path
+        if not path or str(step.id) not in path.get('steps', {}):
+            return None
+        if path.get('stamp') != self._get_approver_path_stamp(org_cache):
+            self._preresolve_approver_path(org_cache)
+            path = self.approver_path
+            if str(step.id) not in path['steps']:
+                return None
+        landed_id, approver_ids = path['steps'][str(step.id)]
+        tracing.event('path_approvers', request_id=self.id, step_id=step.id, user_ids=approver_ids)
+        return self.env['approval.step'].browse(landed_id), self.env['res.users'].browse(approver_ids)
+
+    @api.depends('approver_path', 'completed_step_ids')
+    def _compute_expected_approvers(self):
+        for req in self:
+            steps = (req.approver_path or {}).get('steps') or {}
+            lines = []
+            for step in req._get_flow_definition()._get_ordered_steps() if steps else []:
+                entry = steps.get(str(step.id))
+                if entry and step not in req.completed_step_ids:
+                    names = ', '.join(self.env['res.users'].browse(entry[1]).mapped('name'))
+                    lines.append(f"{step.name}: {names}")
+            req.expected_approvers = '\n'.join(lines) or False
+
+    def _resolve_org_step(self, step, employee, hierarchy_users, org_cache):
+        if step.is_organization:
+            _logger.info(f"Checking org chart approvers for request {self.id}, step '{step.name}'")
+
+            # ✅ Step should only apply if the role’s users are part of this hierarchy
+            matched_users = step.role_id._filter_members(hierarchy_users)
+
+            if not matched_users:
+                # 🚫 No one in hierarchy has this step's role → skip step
+                _logger.info(
+                    f"Skipping step '{step.name}' — no hierarchy user has role '{step.role_id.name}'."
+                )
+                tracing.event('org_step_skipped', request_id=self.id, step_id=step.id, role_id=step.role_id.id,
+                              reason='no hierarchy user has the role')
+
+                # Try to find the next organization step (higher-level approver)
+                next_step = (step.version_id or step.flow_id)._get_next_organization_step(step)
+                if next_step:
+                    _logger.info(f"Moving to next organization step '{next_step.name}' for further check.")
+                    return self._resolve_org_step(next_step, employee, hierarchy_users, org_cache)
+                # ❌ No more organization steps left
+                raise UserError(
+                    f"No valid approver found in organization chart for request {self.id}."
+                )
 
-        try:
-            employee = self.env['hr.employee'].sudo().search([('user_id', '=', self.create_uid.id)], limit=1)
-            if not employee:
-                _logger.warning(f"No employee record found for user {self.create_uid.id}")
-                return step
-
-            hierarchy_info = self.get_hierarchy_with_users_and_groups(employee.job_id)
-            flow_steps = list(step.flow_id.step_ids.sorted(key=lambda s: s.sequence))
-            current_index = flow_steps.index(step)
-            fallback_branch = step.fallback_branch_id.id if step.fallback_branch_id else False
+            # ✅ Found hierarchy user(s) with matching role
+            tracing.event('org_candidates', request_id=self.id, step_id=step.id, user_ids=matched_users.ids)
+            delegated_approvers = self._get_delegates(matched_users, org_cache)
+            if not delegated_approvers:
+                raise UserError(
+                    f"Delegation missing for step '{step.name}' — role has hierarchy users but no delegates."
+                )
 
-            while current_index < len(flow_steps):
-                current_step = flow_steps[current_index]
+            _logger.info(
+                f"Assigned approver(s) {', '.join(u.name for u in delegated_approvers)} "
+                f"for org step '{step.name}'."
+            )
+            return step, delegated_approvers
 
-                if current_step.is_organization:
-                    _logger.info(f"Checking org chart approvers for request {self.id}, step '{current_step.name}'")
+        if step.is_employee_step:
+            if not self.requested_for_id:
+                raise UserError("No 'Requested For' employee defined for this request.")
+            _logger.info(
+                f"Assigned requested employee {self.requested_for_id.name} "
+                f"as approver for employee step '{step.name}'."
+            )
+            return step, self.requested_for_id
+
+        # Static step
+        role_users = step.role_id._get_members()
+        if step.cross_branch:
+            branch = self.branch_id
+            matched_users = role_users.filtered(
+                lambda u: u.default_branch_id == self.branch_id
+            )
+        else:
+            branch = employee.branch_id
+            matched_users = role_users.filtered(
+                lambda u: u.default_branch_id == employee.branch_id
+            )
+            if not matched_users and step.fallback_branch_id:
+                tracing.event('branch_candidates_skipped', request_id=self.id, step_id=step.id,
+                              branch_id=branch.id, reason='no role user in branch')
+                branch = step.fallback_branch_id
+                matched_users = role_users.filtered(
+                    lambda u: u.default_branch_id == step.fallback_branch_id
+                )
+        tracing.event('branch_candidates', request_id=self.id, step_id=step.id,
+                      branch_id=branch.id, user_ids=matched_users.ids)
+
+        delegated_approvers = self._get_delegates(matched_users, org_cache)
+        if not delegated_approvers and not (step.is_final or step.is_condition or step.is_parallel_split):
+            raise UserError(
+                f"No valid approvers found for step '{step.name}'. "
+                f"Ensure the role has users or active delegation rules."
+            )
+        return step, delegated_approvers
 
-                    hierarchy_users = self.env['res.users'].browse([
-                        entry['user'].id for entry in hierarchy_info if entry.get('user')
-                    ])
+    def _get_org_hierarchy(self, org_cache):
+        """Return the creator's employee and the users up its job hierarchy."""
+        key = ('hierarchy', self.create_uid.id)
+        if key not in org_cache:
+            employee = self.env['hr.employee'].sudo().search([('user_id', '=', self.create_uid.id)], limit=1)
+            hierarchy_users = self.env['res.users']
+            if employee:
+                hierarchy_info = self.get_hierarchy_with_users_and_groups(employee.job_id)
+                hierarchy_users = self.env['res.users'].browse([
+                    entry['user'].id for entry in hierarchy_info if entry.get('user')
+                ])
+            org_cache[key] = (employee, hierarchy_users)
+        return org_cache[key]
+
+    def _get_delegates(self, users, org_cache):
+        key = ('delegates', tuple(sorted(users.ids)))
+        if key not in org_cache:
+            org_cache[key] = self.env['approval.delegate'].get_delegate(users)
+        delegates = org_cache[key]
+        added = delegates - users
+        if added:
+            tracing.event('delegates_added', request_id=self.id, user_ids=users.ids, delegate_ids=added.ids)
+        return delegates
+
+    def _notify_approvers_via_activity(self, users=None, message=None, title=None, bus=True):
+        """Schedule a to-do for the approvers of every request of ``self``.
+
+        ``users`` applies to all requests; by default each request's current
+        approvers are used. Existing to-dos are found with one search and the
+        missing ones are created with one ``create``. With ``bus``, the users
+        getting a new to-do are also notified through the coalescing queue.
+        """
+        users_by_request = {
+            req.id: users if users is not None else req.approver_ids
+            for req in self
+        }
+        user_ids = {uid for req_users in users_by_request.values() for uid in req_users.ids}
+        if not user_ids:
+            _logger.warning(f"No users to notify for approval requests {self.ids}")
+            return
 
-                    # ✅ Step should only apply if the role’s users are part of this hierarchy
-                    matched_users = current_step.role_id.users & hierarchy_users
-
-                    if not matched_users:
-                        # 🚫 No one in hierarchy has this step's role → skip step
-                        _logger.info(
-                            f"Skipping step '{current_step.name}' — no hierarchy user has role '{current_step.role_id.name}'."
-                        )
-
-                        # Try to find the next organization step (higher-level approver)
-                        next_steps = flow_steps[flow_steps.index(current_step) + 1:]
-                        for next_step in next_steps:
-                            if next_step.is_organization:
-                                _logger.info(f"Moving to next organization step '{next_step.name}' for further check.")
-                                return self._check_org_chart(next_step)  # recursion to continue hierarchy search
-                        # ❌ No more organization steps left
-                        raise UserError(
-                            f"No valid approver found in organization chart for request {self.id}."
-                        )
-
-                    # ✅ Found hierarchy user(s) with matching role
-                    delegated_approvers = self.env['approval.delegate'].get_delegate(matched_users)
-                    if not delegated_approvers:
-                        raise UserError(
-                            f"Delegation missing for step '{current_step.name}' — role has hierarchy users but no delegates."
-                        )
-
-                    self.approver_ids = delegated_approvers
-                    _logger.info(
-                        f"Assigned approver(s) {', '.join(u.name for u in delegated_approvers)} "
-                        f"for org step '{current_step.name}'."
-                    )
-                    return current_step
+        with instrumentation.phase('activities'):
+            activity_type = self.env.ref('mail.mail_activity_data_todo')
+            existing = self.env['mail.activity'].sudo().search([
+                ('res_model', '=', 'approval.request'),
+                ('res_id', 'in', self.ids),
+                ('user_id', 'in', list(user_ids)),
+                ('activity_type_id', '=', activity_type.id),
+            ])
+            existing_keys = {(activity.res_id, activity.user_id.id) for activity in existing}
+
+            model_id = self.env['ir.model']._get('approval.request').id
+            deadline = fields.Date.today() + timedelta(days=3)
+            target_names = self._get_target_display_names()
+
+            to_create = []
+            for req in self:
+                target_name = target_names.get(req.id) or f"{req.res_model} #{req.res_id}"
+                for user in users_by_request[req.id]:
+                    if (req.id, user.id) in existing_keys:
+                        continue
+                    to_create.append({
+                        'res_model': 'approval.request',
+                        'res_model_id': model_id,
+                        'res_id': req.id,
+                        'activity_type_id': activity_type.id,
+                        'user_id': user.id,
+                        'summary': title or f"Approval Needed for {target_name}",
+                        'note': message or f"Please take action on approval request for {target_name}.",
+                        'date_deadline': deadline,
+                    })
 
-                elif current_step.is_employee_step:
-                    if not self.requested_for_id:
-                        raise UserError("No 'Requested For' employee defined for this request.")
+            if to_create:
+                with self.env.cr.savepoint():
+                    self.env['mail.activity'].sudo().create(to_create)
+                instrumentation.add_rows(len(to_create))
+        if bus:
+            for vals in to_create:
+                queue_notification_to_users(
+                    self.env, self.env['res.users'].browse(vals['user_id']), vals['note'], title=vals['summary'],
+                )
 
-                    # Clear old approvers and assign the employee
-                    self.approver_ids = [(5, 0, 0)]
-                    self.approver_ids = [(6, 0, [self.requested_for_id.id])]
-                    _logger.info(
-                        f"Assigned requested employee {self.requested_for_id.name} "
-                        f"as approver for employee step '{current_step.name}'."
-                    )
-                    return current_step
+    def _notify_requesters(self, status):
+        """Tell the requesters of ``self`` their request was ``status``."""
+        target_names = self._get_target_display_names()
+        for req in self.filtered('requested_by'):
+            target_name = target_names.get(req.id) or f"{req.res_model} #{req.res_id}"
+            queue_notification_to_users(
+                self.env, req.requested_by, f"Your approval request for {target_name} was {status}.",
+                title=f"Request {status.capitalize()}",
+            )
 
+    def _schedule_todo(self, user_id, note):
+        with instrumentation.phase('activities'):
+            self.activity_schedule('mail.mail_activity_data_todo', user_id=user_id, note=note)
+            instrumentation.add_rows(1)
+        queue_notification_to_users(self.env, self.env['res.users'].browse(user_id), note)
 
-                else:
-                    # Static step
-                    if current_step.cross_branch:
-                        matched_users = current_step.role_id.users.filtered(
-                            lambda u: u.default_branch_id == self.branch_id
-                        )
-                    else:
-                        matched_users = current_step.role_id.users.filtered(
-                            lambda u: u.default_branch_id == employee.branch_id
-                        )
-                        if not matched_users and fallback_branch:
-                            matched_users = current_step.role_id.users.filtered(
-                                lambda u: u.default_branch_id.id == fallback_branch
-                            )
-
-                    delegated_approvers = self.env['approval.delegate'].get_delegate(matched_users)
-                    if not delegated_approvers and not current_step.is_final and not current_step.is_condition:
-                        raise UserError(
-                            f"No valid approvers found for step '{current_step.name}'. "
-                            f"Ensure the role has users or active delegation rules."
-                        )
-                    self.approver_ids = delegated_approvers
-
-                    return current_step
-
-                    
-
-            raise UserError("No valid steps found. Workflow cannot continue.")
-
-        except Exception as e:
-            _logger.error(f"Error in _check_org_chart for request {self.id}: {str(e)}", exc_info=True)
-            raise UserError(f"Workflow error: {str(e)}")
-
-    def _notify_approvers_via_activity(self, users, message=None, title=None):
-        self.ensure_one()
-        if not users:
-            _logger.warning(f"No users to notify for approval request {self.id}")
+    def _complete_user_activity(self, user=None):
+        """Marks the user's (current user by default) to-do activities on these requests as done."""
+        if not self:
             return
-        try:
-            target = self.env[self.res_model].sudo().read([self.res_id], ['display_name'])[0]
-            target_name = target.get('display_name', f"{self.res_model} #{self.res_id}")
-        except Exception:
-            target_name = f"{self.res_model} #{self.res_id}"
-
-        title = title or f"Approval Needed for {target_name}"
-        message = message or f"Please take action on approval request for {target_name}."
-
-        activity_type = self.env.ref('mail.mail_activity_data_todo')
-        today = fields.Date.today()
-
-        existing = self.env['mail.activity'].sudo().search([
-            ('res_model', '=', 'approval.request'),
-            ('res_id', '=', self.id),
-            ('user_id', 'in', [u.id for u in users]),
-            ('activity_type_id', '=', activity_type.id),
-            ('state', '=', 'pending'),
-        ])
-        existing_user_ids = set(existing.mapped('user_id').ids)
-
-        model_id = self.env['ir.model']._get('approval.request').id
-
-        to_create = [{
-            'res_model': 'approval.request',
-            'res_model_id': model_id,
-            'res_id': self.id,
-            'activity_type_id': activity_type.id,
-            'user_id': user.id,
-            'summary': title,
-            'note': message,
-            'date_deadline': today + timedelta(days=3),
-        } for user in users if user.id not in existing_user_ids]
-
-        if to_create:
-            with self.env.cr.savepoint():
-                self.env['mail.activity'].sudo().create(to_create)
-
-    def _complete_user_activity(self):
-        """Marks the current user's activity as done for this request."""
-        self.ensure_one()
-        current_user_id = self.env.uid
-
-        activities = self.env['mail.activity'].search([
-            ('res_model', '=', 'approval.request'),
-            ('res_id', '=', self.id),
-            ('user_id', '=', current_user_id),
-            ('activity_type_id', '=', self.env.ref('mail.mail_activity_data_todo').id),
-            ('state', '=', 'pending'),
-        ])
-        for activity in activities:
-            activity.action_done()
+        with instrumentation.phase('activities'):
+            activities = self.env['mail.activity'].search([
+                ('res_model', '=', 'approval.request'),
+                ('res_id', 'in', self.ids),
+                ('user_id', '=', user.id if user else self.env.uid),
+                ('activity_type_id', '=', self.env.ref('mail.mail_activity_data_todo').id),
+            ])
+            if activities:
+                activities.action_done()
+                instrumentation.add_rows(len(activities))
+
+    def _get_target_display_names(self):
+        """Return {request id: target display name}, read per model in batch."""
+        names = {}
+        for req_id, record in self.sudo()._get_target_records().items():
+            try:
+                names[req_id] = record.display_name
+            except Exception:
+                continue
+        return names
 
-    
-    
     def action_approve_all(self, comment=''):
         final_approved = 0
         moved_next = 0
         skipped = 0
 
-        HrLeave = self.env['hr.leave']
-        OnDuty = self.env['onduty.report']
-
+        # Source documents (leaves, on-duty reports, ...) approve through
+        # their own action, which moves the request along
+        targets = self._get_target_records()
         for req in self:
-            if req.status != 'pending':
+            document = targets.get(req.id)
+            if req.status != 'pending' or document is None or not hasattr(document, 'action_approve'):
                 skipped += 1
                 continue
 
-            # Try Leave first
-            leave = HrLeave.search(
-                [('approval_request_id', '=', req.id)],
-                limit=1
-            )
-            if leave:
-                leave.action_approve(comment=comment)
-                if leave.state == 'approved':
-                    final_approved += 1
-                elif req.status == 'pending':
-                    moved_next += 1
-                else:
-                    skipped += 1
-                continue
-
-            # Try OnDuty
-            onduty = OnDuty.search(
-                [('approval_request_id', '=', req.id)],
-                limit=1
-            )
-            if onduty:
-                onduty.action_approve(comment=comment)
-                if onduty.state == 'approved':
-                    final_approved += 1
-                elif onduty.state == 'pending':
-                    moved_next += 1
-                else:
-                    skipped += 1
-                continue
-
-            skipped += 1
+            document.action_approve(comment=comment)
+            if document.state == 'approved':
+                final_approved += 1
+            elif req.status == 'pending':
+                moved_next += 1
+            else:
+                skipped += 1
 
         message = []
         if final_approved:
@@ -764,5 +1828,305 @@ class ApprovalRequest(models.Model):
             'context': {'default_message': message},
         }
 
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+    @api.model
+    def _clear_rejected_approvers(self, chunk_size=5000, commit=False):
+        """Remove the approvers left on rejected requests.
+
+        Relation rows are deleted with plain SQL, ``chunk_size`` requests at a
+        time. With ``commit`` every chunk is committed on its own, which keeps
+        transactions short when run from cron. Returns the number of requests
+        cleaned.
+        """
+        field = self._fields['approver_ids']
+        self.flush_model(['status', 'approver_ids'])
+
+        cleaned_requests = 0
+        removed_rows = 0
+        last_id = 0
+        while True:
+            self.env.cr.execute(f"""
+                SELECT DISTINCT r.id
+                  FROM approval_request r
+                  JOIN {field.relation} rel ON rel.{field.column1} = r.id
+                 WHERE r.status = 'rejected' AND r.id > %s
+              ORDER BY r.id
+                 LIMIT %s
+            """, [last_id, chunk_size])
+            request_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not request_ids:
+                break
+
+            self.env.cr.execute(f"""
+                DELETE FROM {field.relation}
+                 WHERE {field.column1} = ANY(%s)
+             RETURNING {field.column2}
+            """, [request_ids])
+            removed_rows += self.env.cr.rowcount
+            user_ids = {row[0] for row in self.env.cr.fetchall()}
+
+            cleaned_requests += len(request_ids)
+            last_id = request_ids[-1]
+            self.invalidate_model(['approver_ids'])
+            self.env['approval.inbox.version']._touch(user_ids)
+            if commit:
+                self.env.cr.commit()
+
+        _logger.info(
+            "Cleared approvers from %s rejected requests (%s approver links removed).",
+            cleaned_requests, removed_rows,
+        )
+        return cleaned_requests
+
+    @api.model
+    def _cron_clear_rejected_approvers(self):
+        run_with_retry(self.env, lambda env: env['approval.request']._clear_rejected_approvers(commit=True))
+
+    @api.model
+    def _compact_tracking_messages(self, chunk_size=500, commit=False):
+        """Collapse the tracking-only messages of closed requests into one
+        summary message per request.
+
+        Only messages without a body that carry tracking values are
+        compacted; comments and other messages are left alone. Requests are
+        handled ``chunk_size`` at a time; with ``commit`` every chunk is
+        committed on its own. Returns the number of messages removed.
+        """
+        self.env.flush_all()
+        note_subtype = self.env.ref('mail.mt_note')
+        author = self.env.ref('base.partner_root')
+
+        removed = 0
+        last_id = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT m.res_id
+                  FROM mail_message m
+                  JOIN approval_request r ON r.id = m.res_id
+                 WHERE m.model = 'approval.request'
+                   AND m.res_id > %s
+                   AND r.status IN ('approved', 'rejected')
+                   AND COALESCE(m.body, '') IN ('', '<p></p>')
+                   AND EXISTS (SELECT 1 FROM mail_tracking_value t WHERE t.mail_message_id = m.id)
+              GROUP BY m.res_id
+                HAVING COUNT(*) > 1
+              ORDER BY m.res_id
+                 LIMIT %s
+            """, [last_id, chunk_size])
+            request_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not request_ids:
+                break
+            last_id = request_ids[-1]
+
+            self.env.cr.execute("""
+                SELECT m.res_id, m.id, m.date, t.field_id,
+                       COALESCE(t.old_value_char, t.old_value_text, t.old_value_integer::text,
+                                t.old_value_float::text, t.old_value_datetime::text, ''),
+                       COALESCE(t.new_value_char, t.new_value_text, t.new_value_integer::text,
+                                t.new_value_float::text, t.new_value_datetime::text, '')
+                  FROM mail_message m
+                  JOIN mail_tracking_value t ON t.mail_message_id = m.id
+                 WHERE m.model = 'approval.request'
+                   AND m.res_id = ANY(%s)
+                   AND COALESCE(m.body, '') IN ('', '<p></p>')
+              ORDER BY m.res_id, m.date, m.id, t.id
+            """, [request_ids])
+            rows = self.env.cr.fetchall()
+
+            field_names = {
+                field.id: field.field_description
+                for field in self.env['ir.model.fields'].browse({row[3] for row in rows})
+            }
+            changes_by_request = defaultdict(list)
+            last_dates = {}
+            message_ids = set()
+            for res_id, message_id, date, field_id, old_value, new_value in rows:
+                message_ids.add(message_id)
+                last_dates[res_id] = date
+                changes_by_request[res_id].append(
+                    f"<li>{fields.Datetime.to_string(date)} {html_escape(field_names.get(field_id, ''))}: "
+                    f"{html_escape(old_value)} → {html_escape(new_value)}</li>"
+                )
 
+            self.env['mail.message'].sudo().create([{
+                'model': 'approval.request',
+                'res_id': res_id,
+                'message_type': 'notification',
+                'subtype_id': note_subtype.id,
+                'author_id': author.id,
+                'date': last_dates[res_id],
+                'body': Markup(f"<p>Tracking summary</p><ul>{''.join(changes)}</ul>"),
+            } for res_id, changes in changes_by_request.items()])
+
+            # Tracking values, notifications and partner links go with ON DELETE CASCADE
+            self.env.cr.execute("DELETE FROM mail_message WHERE id = ANY(%s)", [list(message_ids)])
+            removed += len(message_ids)
+            self.env.invalidate_all()
+            if commit:
+                self.env.cr.commit()
+
+        _logger.info("Compacted %s tracking messages of closed approval requests.", removed)
+        return removed
+
+    @api.model
+    def _cron_compact_tracking_messages(self):
+        run_with_retry(self.env, lambda env: env['approval.request']._compact_tracking_messages(commit=True))
+
+    @api.model
+    def _escalate_overdue_requests(self, chunk_size=500, commit=False):
+        """Escalate the pending requests that stayed at a step longer than
+        its SLA (``approval.step.sla_hours``).
+
+        Overdue requests are found with one query on the (status,
+        current_step_id, entered_at) index and escalated ``chunk_size`` at a
+        time; with ``commit`` every chunk is committed on its own. A chunk
+        hitting a concurrent transition is rolled back and skipped, its
+        requests are escalated by the next run if still overdue. A request
+        is escalated again only after another SLA period without progress.
+        Returns the number of requests escalated.
+        """
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT r.id
+              FROM approval_step s
+              JOIN approval_request r
+                ON r.status = 'pending'
+               AND r.current_step_id = s.id
+               AND r.entered_at < %(now)s - s.sla_hours * interval '1 hour'
+             WHERE s.sla_hours > 0
+               AND (r.sla_escalated_at IS NULL OR r.sla_escalated_at < %(now)s - s.sla_hours * interval '1 hour')
+          ORDER BY r.id
+        """, {'now': fields.Datetime.now()})
+        request_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        escalated = 0
+        for start in range(0, len(request_ids), chunk_size):
+            chunk = self.browse(request_ids[start:start + chunk_size])
+            try:
+                with self.env.cr.savepoint():
+                    escalated += len(chunk._escalate_sla())
+            except CONCURRENCY_ERRORS as e:
+                _logger.info("Skipped escalating approval requests %s-%s: %s", chunk[:1].id, chunk[-1:].id, type(e).__name__)
+            if commit:
+                self.env.cr.commit()
+
+        if escalated:
+            _logger.info("Escalated %s overdue approval requests.", escalated)
+        return escalated
+
+    def _escalate_sla(self):
+        """Apply the SLA action of their current step to the requests of
+        ``self`` still overdue once locked, and return them.
+
+        ``notify`` reminds the approvers, ``reassign`` moves the request to
+        the next organization step and ``forward`` approves the step on the
+        approvers' behalf. When a request cannot be moved, or waits for the
+        branches of a parallel split, its approvers are reminded instead.
+        """
+        self._lock_for_transition()
+        self.invalidate_recordset()
+        now = fields.Datetime.now()
+
+        def is_overdue(req):
+            sla = timedelta(hours=req.current_step_id.sla_hours)
+            return (
+                req.status == 'pending' and sla
+                and req.entered_at and req.entered_at < now - sla
+                and (not req.sla_escalated_at or req.sla_escalated_at < now - sla)
+            )
 
+        overdue = self.filtered(is_overdue)
+        if not overdue:
+            return overdue
+
+        with instrumentation.transition(self.env, 'sla_escalation', overdue):
+            overdue._prefetch_flow_structure()
+            action = self._get_system_action('auto_escalate')
+            org_cache = {}
+            plans = {}
+            history_vals = []
+            reminded = self.browse()
+            for req in overdue:
+                step = req.current_step_id
+                plan = None
+                try:
+                    if req.branches_remaining:
+                        # branches move on their own steps, not the request
+                        pass
+                    elif step.sla_action == 'reassign':
+                        plan = req._plan_sla_reassign(step, org_cache)
+                    elif step.sla_action == 'forward':
+                        plan = req._plan_sla_forward(step, org_cache)
+                except UserError as e:
+                    _logger.warning("Could not escalate approval request %s: %s", req.id, e)
+
+                if plan:
+                    plans[req] = plan
+                    comment = f"Escalated after the {step.sla_hours:g}h SLA of step '{step.name}'."
+                else:
+                    reminded |= req
+                    comment = f"Approvers reminded after the {step.sla_hours:g}h SLA of step '{step.name}'."
+                history_vals.append({
+                    'request_id': req.id,
+                    'step_id': step.id,
+                    'user_id': self.env.uid,
+                    'action_id': action.id,
+                    'comment': comment,
+                })
+
+            moved = self.browse([req.id for req in plans])
+            if moved:
+                # the to-dos of the previous approvers are obsolete
+                with instrumentation.phase('activities'):
+                    self.env['mail.activity'].sudo().search([
+                        ('res_model', '=', 'approval.request'),
+                        ('res_id', 'in', moved.ids),
+                        ('activity_type_id', '=', self.env.ref('mail.mail_activity_data_todo').id),
+                    ]).unlink()
+            self._apply_routes(plans, history_vals)
+
+            if reminded:
+                reminded.write({'sla_escalated_at': now})
+                reminded._notify_approvers_via_activity(
+                    message="This approval request is overdue.", title="Overdue Approval", bus=False,
+                )
+                for req in reminded:
+                    queue_notification_to_users(
+                        self.env, req.approver_ids,
+                        f"Approval request for {req.res_model} #{req.res_id} is overdue at step '{req.current_step_id.name}'.",
+                        title='Overdue Approval',
+                    )
+        return overdue
+
+    def _plan_sla_reassign(self, step, org_cache):
+        """Route plan moving the request to the next organization step."""
+        next_step = (step.version_id or step.flow_id)._get_next_organization_step(step)
+        if not next_step:
+            return None
+        next_step, approvers = self._resolve_org_chart(next_step, org_cache)
+        if not approvers:
+            return None
+        return {
+            'passed': [],
+            'completed': [],
+            'step': next_step,
+            'approvers': approvers,
+            'status': None,
+            'notify': True,
+        }
+
+    def _plan_sla_forward(self, step, org_cache):
+        """Route plan approving ``step`` on behalf of its approvers."""
+        next_step = step.action_ids.filtered(lambda a: a.action_id.code == 'approve')[:1].next_step_id
+        if not next_step:
+            return None
+        plan = self._plan_route(next_step, org_cache)
+        plan['completed'].insert(0, step.id)
+        plan['notify'] = plan['status'] != 'approved'
+        return plan
+
+    @api.model
+    def _cron_escalate_overdue_requests(self):
+        run_with_retry(self.env, lambda env: env['approval.request']._escalate_overdue_requests(commit=True))
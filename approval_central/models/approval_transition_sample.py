@@ -0,0 +1,74 @@
+from odoo import models, fields, api
+from datetime import timedelta
+
+# Samples older than this are removed by the autovacuum
+SAMPLE_RETENTION_DAYS = 30
+
+
+class ApprovalTransitionSample(models.Model):
+    """Counters of sampled engine transitions, see ``utils.instrumentation``."""
+    _name = 'approval.transition.sample'
+    _description = 'Approval Transition Sample'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    date = fields.Datetime(string='Date', default=fields.Datetime.now, readonly=True, index=True)
+    kind = fields.Char(string='Transition', readonly=True)
+    request_id = fields.Many2one('approval.request', string='Approval Request', ondelete='set null', readonly=True)
+    request_count = fields.Integer(string='Requests', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', ondelete='set null', readonly=True)
+    queries = fields.Integer(string='Queries', readonly=True)
+    duration_ms = fields.Float(string='Duration (ms)', readonly=True)
+    rows = fields.Integer(string='Rows Written', readonly=True)
+    phases = fields.Json(string='Phases', readonly=True)
+
+    @api.model
+    def _record(self, metrics):
+        return self.create({
+            'kind': metrics.kind,
+            'request_id': metrics.request_ids[0] if metrics.request_ids else False,
+            'request_count': len(metrics.request_ids),
+            'user_id': self.env.uid,
+            'queries': metrics.queries,
+            'duration_ms': round(metrics.duration_ms, 3),
+            'rows': metrics.rows,
+            'phases': metrics.as_dict()['phases'],
+        })
+
+    @api.autovacuum
+    def _gc_samples(self):
+        cutoff = fields.Datetime.now() - timedelta(days=SAMPLE_RETENTION_DAYS)
+        self.search([('date', '<', cutoff)]).unlink()
+
+
+class ApprovalTransitionTrace(models.Model):
+    """Span trees of traced engine transitions, see ``utils.tracing``."""
+    _name = 'approval.transition.trace'
+    _description = 'Approval Transition Trace'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    date = fields.Datetime(string='Date', default=fields.Datetime.now, readonly=True, index=True)
+    kind = fields.Char(string='Transition', readonly=True)
+    request_id = fields.Many2one('approval.request', string='Approval Request', ondelete='set null', readonly=True)
+    request_count = fields.Integer(string='Requests', readonly=True)
+    user_id = fields.Many2one('res.users', string='User', ondelete='set null', readonly=True)
+    duration_ms = fields.Float(string='Duration (ms)', readonly=True)
+    trace = fields.Json(string='Trace', readonly=True)
+
+    @api.model
+    def _record(self, trace):
+        attrs = trace['attrs']
+        return self.create({
+            'kind': attrs['kind'],
+            'request_id': attrs['requests'][0] if attrs['requests'] else False,
+            'request_count': len(attrs['requests']),
+            'user_id': attrs['user_id'],
+            'duration_ms': trace['ms'],
+            'trace': trace,
+        })
+
+    @api.autovacuum
+    def _gc_traces(self):
+        cutoff = fields.Datetime.now() - timedelta(days=SAMPLE_RETENTION_DAYS)
+        self.search([('date', '<', cutoff)]).unlink()
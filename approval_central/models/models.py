@@ -1,5 +1,7 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError,UserError
+from .approval_indexes import create_approval_indexes
+from .approval_flow_analysis import analyze_flow
 
 
 class ApprovalFlow(models.Model):
@@ -17,9 +19,33 @@ class ApprovalFlow(models.Model):
 
     company_id = fields.Many2one('res.company', string='Company')
     active = fields.Boolean(default=True)
-    step_ids = fields.One2many('approval.step', 'flow_id', string='Steps')
+    step_ids = fields.One2many('approval.step', 'flow_id', string='Steps', domain=[('version_id', '=', False)])
+    version_ids = fields.One2many('approval.flow.version', 'flow_id', string='Versions')
+    current_version_id = fields.Many2one(
+        'approval.flow.version',
+        string='Current Version',
+        readonly=True,
+        copy=False,
+        help="Published version new requests are pinned to. Without one, requests follow the live steps."
+    )
+    preresolve_approvers = fields.Boolean(
+        string='Pre-resolve Approvers',
+        help="Resolve the approvers of every remaining step when a request is created or amended. "
+             "Transitions then assign them without resolving the org chart again, and requesters see who is next."
+    )
     created_by = fields.Many2one('res.users', string='Created By', default=lambda self: self.env.user)
     updated_by = fields.Many2one('res.users', string='Updated By')
+    compiled_structure = fields.Json(
+        string='Compiled Structure',
+        compute='_compute_compiled_structure',
+        store=True,
+        help="Step order, organization fallbacks and reachability computed when the flow is saved."
+    )
+    analysis_warnings = fields.Text(
+        string='Flow Warnings',
+        compute='_compute_compiled_structure',
+        store=True,
+    )
 
     @api.model
     def create(self, vals):
@@ -30,6 +56,103 @@ class ApprovalFlow(models.Model):
         vals['updated_by'] = self.env.user.id
         return super().write(vals)
 
+    @api.model
+    def _get_flow_index(self):
+        """Return {(model, company id or False, request type or None): flow id}
+        for the active flows; the None request type maps to the first flow.
+
+        Cached per registry under a fingerprint of the flow columns the
+        index is built from, read from the (few) flow rows: a change made
+        by any transaction or worker yields a new entry, without clearing
+        any cache. Callers must not modify the result.
+        """
+        self.flush_model(['request_model_id', 'company_id', 'request_type', 'active'])
+        self.env.cr.execute("""
+            SELECT md5(string_agg(concat_ws(',', id, request_model_id, company_id, request_type, active), ';' ORDER BY id))
+              FROM approval_flow
+        """)
+        return self._build_flow_index(self.env.cr.fetchone()[0])
+
+    @api.model
+    @tools.ormcache('fingerprint')
+    def _build_flow_index(self, fingerprint):
+        index = {}
+        for flow in self.sudo().search([], order='id'):
+            for request_type in (flow.request_type, None):
+                index.setdefault((flow.request_model_id.model, flow.company_id.id, request_type), flow.id)
+        return index
+
+    @api.model
+    def resolve_flows(self, records, request_type=None):
+        """Return {record id: flow} for the records of a source model.
+
+        A flow of the record's company (``company_id`` when the model has
+        one, the current company otherwise) wins over a flow without a
+        company. Records without an applicable flow are left out. Lookups
+        hit the cached index, so resolving a large batch runs no search.
+        """
+        index = self._get_flow_index()
+        has_company = 'company_id' in records._fields
+        flows = {}
+        for record in records:
+            company_id = record.company_id.id if has_company else self.env.company.id
+            flow_id = (
+                index.get((records._name, company_id, request_type))
+                or index.get((records._name, False, request_type))
+            )
+            if flow_id:
+                flows[record.id] = self.browse(flow_id)
+        return flows
+
+    @api.model
+    def resolve_flow(self, record, request_type=None):
+        """The flow applicable to ``record``, see ``resolve_flows``."""
+        return self.resolve_flows(record, request_type).get(record.id, self.browse())
+
+    @api.depends(
+        'step_ids.sequence', 'step_ids.name', 'step_ids.is_initiator', 'step_ids.is_final',
+        'step_ids.is_condition', 'step_ids.is_organization', 'step_ids.next_step_ids',
+        'step_ids.is_parallel_split', 'step_ids.join_step_id', 'step_ids.required_branches',
+        'step_ids.condition_ids.next_step_id', 'step_ids.action_ids.next_step_id',
+        'step_ids.action_ids.action_id',
+    )
+    def _compute_compiled_structure(self):
+        for flow in self:
+            structure = analyze_flow(flow.step_ids)
+            flow.compiled_structure = structure
+            flow.analysis_warnings = '\n'.join(structure['warnings']) or False
+
+    def action_publish(self):
+        """Snapshot the flow into a new version that new requests will follow."""
+        for flow in self:
+            flow.current_version_id = self.env['approval.flow.version']._publish(flow)
+        return True
+
+    def _check_structure(self):
+        """Raise when a flow has errors the engine cannot run with."""
+        for flow in self:
+            errors = (flow.compiled_structure or {}).get('errors')
+            if errors:
+                raise ValidationError(f"Flow '{flow.name}' is invalid:\n" + '\n'.join(errors))
+
+    def _get_ordered_steps(self):
+        """Steps of the flow by sequence, from the compiled structure."""
+        self.ensure_one()
+        order = (self.compiled_structure or {}).get('order')
+        if order is None:
+            return self.step_ids.sorted(key=lambda s: (s.sequence, s.id))
+        return self.env['approval.step'].browse(order)
+
+    def _get_next_organization_step(self, step):
+        """The organization step following ``step`` in sequence, if any."""
+        self.ensure_one()
+        next_organization = (self.compiled_structure or {}).get('next_organization')
+        if next_organization is None:
+            steps = self._get_ordered_steps()
+            following = steps[list(steps).index(step) + 1:].filtered('is_organization')
+            return following[:1]
+        return self.env['approval.step'].browse(next_organization.get(str(step.id)) or [])
+
 
 class ApprovalStep(models.Model):
     _name = 'approval.step'
@@ -52,16 +175,87 @@ class ApprovalStep(models.Model):
     company_id = fields.Many2one('res.company', string='Company')
     branch_id = fields.Many2one('account.analytic.account', string='Branch')
     fallback_branch_id = fields.Many2one('account.analytic.account', string='Fallback Branch')
-    next_step_ids = fields.Many2many('approval.step', 'approval_step_next_rel', 'step_id', 'next_step_id', string='Next Steps', domain="[('flow_id', '=', flow_id)]")
+    next_step_ids = fields.Many2many('approval.step', 'approval_step_next_rel', 'step_id', 'next_step_id', string='Next Steps', domain="[('flow_id', '=', flow_id), ('version_id', '=', False)]")
     is_initiator = fields.Boolean(string='Is Initiator Step', default=False)
     is_final = fields.Boolean(string='Is Final Step', default=False)
     cross_branch = fields.Boolean(string='Is Cross Branch', default=False)
     action_ids = fields.One2many('approval.step.action', 'step_id', string='Actions')
+    sla_hours = fields.Float(
+        string='SLA (hours)',
+        help="How long a request may stay at this step before it is escalated. 0 disables escalation."
+    )
+    sla_action = fields.Selection([
+        ('notify', 'Remind Approvers'),
+        ('reassign', 'Reassign to Next Organization Level'),
+        ('forward', 'Forward Automatically'),
+    ], string='SLA Escalation', default='notify', required=True)
+    is_parallel_split = fields.Boolean(
+        string='Is Parallel Split',
+        default=False,
+        help="Start one branch per next step; the request waits at the join step until the branches are done."
+    )
+    join_step_id = fields.Many2one(
+        'approval.step',
+        string='Join Step',
+        domain="[('flow_id', '=', flow_id), ('version_id', '=', False)]",
+        help="Step the branches of this split lead to. The request moves on to it once enough branches reached it."
+    )
+    required_branches = fields.Integer(
+        string='Required Branches',
+        help="Branches that must reach the join step. 0 waits for all of them; the others are cancelled."
+    )
     is_employee_step = fields.Boolean(
         string="Is Employee Step",
         default=False,
         help="Assign this step to the employee the request is for (not the creator)."
     )
+    version_id = fields.Many2one(
+        'approval.flow.version',
+        string='Flow Version',
+        ondelete='cascade',
+        readonly=True,
+        index=True,
+        copy=False,
+        help="Set on the frozen copies of steps made when a flow is published."
+    )
+    origin_step_id = fields.Many2one('approval.step', string='Copied From', readonly=True, copy=False)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if not self.env.context.get('approval_publishing') and any(vals.get('version_id') for vals in vals_list):
+            raise UserError("Steps of published flow versions are created by publishing the flow.")
+        steps = super().create(vals_list)
+        steps._invalidate_approver_paths()
+        return steps
+
+    def write(self, vals):
+        self._check_editable()
+        res = super().write(vals)
+        self._invalidate_approver_paths()
+        return res
+
+    def unlink(self):
+        self._check_editable()
+        self._invalidate_approver_paths()
+        return super().unlink()
+
+    def _check_editable(self):
+        if not self.env.context.get('approval_publishing') and any(step.version_id for step in self):
+            raise UserError(
+                "Steps of a published flow version cannot be modified. Edit the flow and publish it again."
+            )
+
+    def _invalidate_approver_paths(self):
+        """Approver paths resolved from the steps of live flows no longer
+        hold once these steps, their conditions or actions change. Steps of
+        published versions never change after publishing."""
+        if any(not step.version_id for step in self):
+            self.env['approval.request']._invalidate_approver_paths()
+
+    @api.constrains('flow_id', 'is_condition', 'next_step_ids', 'is_parallel_split', 'join_step_id', 'required_branches')
+    def _check_flow_structure(self):
+        self.flow_id._check_structure()
+
     @api.constrains('is_condition', 'condition_ids')
     def _check_condition_steps(self):
         for step in self:
@@ -77,7 +271,7 @@ class ApprovalStep(models.Model):
     def _check_role_for_non_initiator(self):
         for step in self:
             if not step.is_initiator and not step.role_id:
-                if step.is_final| step.is_employee_step| step.is_condition:
+                if step.is_final| step.is_employee_step| step.is_condition| step.is_parallel_split:
                     continue
                 raise ValidationError(
                     "You must select a User Group when the step is not an Initiator."
@@ -110,6 +304,19 @@ class ApprovalHistory(models.Model):
     )
     comment = fields.Text(string='Comment')
     date = fields.Datetime(string='Action Date', default=fields.Datetime.now)
+    idempotency_key = fields.Char(
+        string='Idempotency Key',
+        copy=False,
+        help="Client-supplied key of the submission that produced this entry; a repeated submission with the same key is not applied twice."
+    )
+
+    _sql_constraints = [
+        ('request_idempotency_key_uniq', 'unique(request_id, idempotency_key)',
+         'This submission was already applied to the request.'),
+    ]
+
+    def init(self):
+        create_approval_indexes(self.env.cr, self._table)
 
     def _compute_appraisal_info(self):
         """Find related appraisal & employee based on request link."""
@@ -136,3 +343,25 @@ class ApprovalStepAction(models.Model):
         ondelete='restrict'
     )
     next_step_id = fields.Many2one('approval.step', string='Next Step')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['approval.step'].browse([vals['step_id'] for vals in vals_list if vals.get('step_id')])._check_editable()
+        step_actions = super().create(vals_list)
+        step_actions.step_id._invalidate_approver_paths()
+        return step_actions
+
+    def write(self, vals):
+        self.step_id._check_editable()
+        res = super().write(vals)
+        self.step_id._invalidate_approver_paths()
+        return res
+
+    def unlink(self):
+        self.step_id._check_editable()
+        self.step_id._invalidate_approver_paths()
+        return super().unlink()
+
+    @api.constrains('step_id', 'next_step_id', 'action_id')
+    def _check_flow_structure(self):
+        self.step_id.flow_id._check_structure()
@@ -0,0 +1,111 @@
+from odoo import models, api, tools
+
+# res.users fields whose change alters group membership
+MEMBERSHIP_FIELDS = ('groups_id', 'active')
+
+# res.users fields approvers are matched on, besides membership
+APPROVER_FIELDS = ('default_branch_id',)
+
+
+class ResGroups(models.Model):
+    _inherit = 'res.groups'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        groups = super().create(vals_list)
+        self.env.registry.clear_cache('groups')
+        return groups
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'users' in vals or 'implied_ids' in vals:
+            self.env.registry.clear_cache('groups')
+            self.env['approval.request']._invalidate_approver_paths()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache('groups')
+        self.env['approval.request']._invalidate_approver_paths()
+        return res
+
+    @api.model
+    @tools.ormcache('group_id', cache='groups')
+    def _get_member_ids(self, group_id):
+        """Return the frozenset of the ids of the active users of group
+        ``group_id``, implied groups included.
+
+        Cached per registry in the ``groups`` cache, which is cleared when
+        groups, implied groups, users or the groups of users change.
+        Callers must not rely on record rules.
+        """
+        if not group_id:
+            return frozenset()
+        Users = self.env['res.users']
+        field = Users._fields['groups_id']
+        Users.flush_model(['groups_id', 'active'])
+        self.env.cr.execute(f"""
+            SELECT rel.{field.column1}
+              FROM {field.relation} rel
+              JOIN res_users u ON u.id = rel.{field.column1}
+             WHERE rel.{field.column2} = %s AND u.active
+        """, [group_id])
+        return frozenset(row[0] for row in self.env.cr.fetchall())
+
+    def _get_members(self):
+        """Active users of the group (none for an empty recordset), from
+        the cached membership index."""
+        return self.env['res.users'].browse(sorted(self._get_member_ids(self.id)))
+
+    def _filter_members(self, users):
+        """The users of ``users`` that belong to the group, in their order."""
+        member_ids = self._get_member_ids(self.id)
+        return users.filtered(lambda user: user.id in member_ids)
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        users = super().create(vals_list)
+        self.env.registry.clear_cache('groups')
+        self.env['approval.request']._invalidate_approver_paths()
+        return users
+
+    def write(self, vals):
+        res = super().write(vals)
+        membership_changed = any(
+            key in MEMBERSHIP_FIELDS or key.startswith(('in_group_', 'sel_groups_')) for key in vals
+        )
+        if membership_changed:
+            self.env.registry.clear_cache('groups')
+        if membership_changed or any(key in APPROVER_FIELDS for key in vals):
+            self.env['approval.request']._invalidate_approver_paths()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache('groups')
+        self.env['approval.request']._invalidate_approver_paths()
+        return res
+
+    @api.model
+    @tools.ormcache('user_id', cache='groups')
+    def _get_group_ids(self, user_id):
+        """Return the frozenset of the ids of the groups of user ``user_id``,
+        implied groups included, without building ``groups_id``.
+
+        Cached per registry, see ``res.groups._get_member_ids``.
+        """
+        field = self._fields['groups_id']
+        self.flush_model(['groups_id'])
+        self.env.cr.execute(
+            f"SELECT {field.column2} FROM {field.relation} WHERE {field.column1} = %s", [user_id]
+        )
+        return frozenset(row[0] for row in self.env.cr.fetchall())
+
+    def _in_group(self, group):
+        """Whether the user belongs to ``group``, from the cached index."""
+        self.ensure_one()
+        return bool(group) and group.id in self._get_group_ids(self.id)
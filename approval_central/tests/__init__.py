@@ -0,0 +1,7 @@
+from . import test_approver_path
+from . import test_concurrency
+from . import test_export
+from . import test_flow_versions
+from . import test_inbox
+from . import test_indexes
+from . import test_parallel_branches
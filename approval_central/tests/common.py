@@ -0,0 +1,84 @@
+import unittest
+
+from odoo.tests import TransactionCase
+
+
+class ApprovalCase(TransactionCase):
+    """Users, roles and a flow builder shared by the approval engine tests.
+
+    The engine resolves approvers through the HR org chart and the branch
+    fields of companion modules; without them the tests are skipped.
+    ``requester`` has an employee without job or branch, so static steps
+    are approved by the members of their role without a default branch.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        missing = [
+            f"{model}.{field}" for model, field in (
+                ('res.users', 'default_branch_id'),
+                ('hr.employee', 'branch_id'),
+                ('hr.job', 'parent_id'),
+            )
+            if model not in cls.env or field not in cls.env[model]._fields
+        ]
+        if missing:
+            raise unittest.SkipTest(f"The approval engine needs fields that are not installed: {', '.join(missing)}")
+
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.action_approve = cls.env.ref('approval_central.approval_action_approve')
+        cls.requester = cls._create_user('approval_requester')
+        cls.env['hr.employee'].create({'name': 'Approval Requester', 'user_id': cls.requester.id})
+
+    @classmethod
+    def _create_user(cls, login):
+        return cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': login.replace('_', ' ').title(),
+            'login': login,
+            'groups_id': [(6, 0, [
+                cls.env.ref('base.group_user').id,
+                cls.env.ref('approval_central.group_approval').id,
+                cls.env.ref('approval_central.group_approval_user').id,
+            ])],
+        })
+
+    @classmethod
+    def _create_role(cls, name, users):
+        return cls.env['res.groups'].create({'name': name, 'users': [(6, 0, users.ids)]})
+
+    @classmethod
+    def _create_flow(cls, name, **vals):
+        return cls.env['approval.flow'].create({
+            'name': name,
+            'request_type': name.lower().replace(' ', '_'),
+            'request_model_id': cls.env.ref('base.model_res_partner').id,
+            **vals,
+        })
+
+    @classmethod
+    def _create_step(cls, flow, name, sequence, next_step=None, **vals):
+        """A step of ``flow``; approving it leads to ``next_step``."""
+        actions = [(0, 0, {'action_id': cls.action_approve.id, 'next_step_id': next_step.id})] if next_step else []
+        return cls.env['approval.step'].create({
+            'flow_id': flow.id,
+            'name': name,
+            'sequence': sequence,
+            'action_ids': actions,
+            **vals,
+        })
+
+    @classmethod
+    def _create_documents(cls, count=1):
+        return cls.env['res.partner'].create([{'name': f'Approval Document {index}'} for index in range(count)])
+
+    @classmethod
+    def _submit(cls, flow, documents):
+        """Requests of ``requester`` for ``documents``, routed past the initiator step."""
+        requests = cls.env['approval.request'].with_user(cls.requester).sudo().create_for_documents(
+            flow, documents, module_name='approval_central',
+        )
+        return requests.with_env(cls.env)
+
+    def _approve(self, request, user, **context):
+        return request.with_user(user).with_context(action_type='approve', **context).process_action()
@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from .common import ApprovalCase
+
+
+class TestApproverPath(ApprovalCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.approver = cls._create_user('approval_path_approver')
+        cls.other_approver = cls._create_user('approval_path_other_approver')
+        cls.role = cls._create_role('Path Reviewers', cls.approver)
+        cls.other_role = cls._create_role('Path Other Reviewers', cls.other_approver)
+        cls.flow = cls._create_flow('Path Flow', preresolve_approvers=True)
+        cls.final = cls._create_step(cls.flow, 'Approved', 30, is_final=True)
+        cls.review = cls._create_step(cls.flow, 'Review', 20, next_step=cls.final, role_id=cls.role.id)
+        cls._create_step(cls.flow, 'Submit', 10, next_step=cls.review, is_initiator=True)
+
+    def _path_approvers(self, request):
+        __, approvers = request._get_path_approvers(self.review)
+        return approvers
+
+    def test_batch_shares_one_write(self):
+        writes = []
+        Request = type(self.env['approval.request'])
+        write = Request.write
+
+        def counting_write(records, vals):
+            if 'approver_path' in vals:
+                writes.append(records.ids)
+            return write(records, vals)
+
+        with patch.object(Request, 'write', counting_write):
+            requests = self._submit(self.flow, self._create_documents(3))
+        self.assertEqual(writes, [requests.ids])
+        self.assertEqual(requests[0].approver_path['steps'], {str(self.review.id): [self.review.id, self.approver.ids]})
+        self.assertEqual(requests.mapped('approver_path'), [requests[0].approver_path] * 3)
+
+    def test_step_change_invalidates_path(self):
+        request = self._submit(self.flow, self._create_documents())
+        stamp = request.approver_path['stamp']
+        self.assertEqual(stamp, request._get_approver_path_stamp())
+
+        self.review.role_id = self.other_role
+        self.assertNotEqual(request._get_approver_path_stamp(), stamp)
+        self.assertEqual(self._path_approvers(request), self.other_approver)
+        self.assertEqual(request.approver_path['stamp'], request._get_approver_path_stamp())
+
+    def test_step_action_change_invalidates_path(self):
+        request = self._submit(self.flow, self._create_documents())
+        stamp = request.approver_path['stamp']
+        self.review.action_ids.write({'next_step_id': self.final.id})
+        self.assertNotEqual(request._get_approver_path_stamp(), stamp)
+
+    def test_role_members_change_invalidates_path(self):
+        request = self._submit(self.flow, self._create_documents())
+        self.role.users = [(4, self.other_approver.id)]
+        self.assertEqual(self._path_approvers(request), self.approver | self.other_approver)
+
+        self._approve(request, self.other_approver)
+        self.assertEqual(request.status, 'approved')
+
+    def test_published_version_keeps_path(self):
+        self.flow.action_publish()
+        request = self._submit(self.flow, self._create_documents())
+        stamp = request.approver_path['stamp']
+        # publishing again only creates new version steps
+        self.flow.action_publish()
+        self.assertEqual(request._get_approver_path_stamp(), stamp)
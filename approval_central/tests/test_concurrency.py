@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, tagged
+from odoo.tests.common import get_db_name
+
+from ..utils.concurrency import CONCURRENCY_ERRORS, run_with_retry
+
+
+@tagged('-at_install', 'post_install')
+class TestConcurrentTransitions(BaseCase):
+    """Two transactions submitting the same transition at once.
+
+    Runs on real cursors committed to the database, since the race is
+    between two transactions; the fixtures are removed afterwards.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.registry = Registry(get_db_name())
+        suffix = uuid.uuid4().hex[:8]
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            users = env['res.users'].with_context(no_reset_password=True).create([{
+                'name': f'Committee {i} {suffix}',
+                'login': f'approval_committee_{i}_{suffix}',
+                'groups_id': [(6, 0, [
+                    env.ref('base.group_user').id,
+                    env.ref('approval_central.group_approval').id,
+                    env.ref('approval_central.group_approval_user').id,
+                ])],
+            } for i in range(2)])
+            role = env['res.groups'].create({'name': f'Committee {suffix}', 'users': [(6, 0, users.ids)]})
+            flow = env['approval.flow'].create({
+                'name': f'Committee {suffix}',
+                'request_type': f'committee_{suffix}',
+                'request_model_id': env.ref('base.model_res_partner').id,
+            })
+            final_step = env['approval.step'].create({
+                'flow_id': flow.id, 'name': 'Approved', 'sequence': 20, 'is_final': True,
+            })
+            step = env['approval.step'].create({
+                'flow_id': flow.id,
+                'name': 'Committee',
+                'sequence': 10,
+                'role_id': role.id,
+                'committee_approval': True,
+                'required_approval_percent': 100,
+                'action_ids': [(0, 0, {
+                    'action_id': env.ref('approval_central.approval_action_approve').id,
+                    'next_step_id': final_step.id,
+                })],
+            })
+            request = env['approval.request'].create({
+                'flow_id': flow.id,
+                'res_model': 'res.partner',
+                'res_id': users[0].partner_id.id,
+                'module_name': 'base',
+                'current_step_id': step.id,
+                'approver_ids': [(6, 0, users.ids)],
+            })
+            self.user_id = users[0].id
+            self.request_id = request.id
+            self.addCleanup(self._cleanup, request.id, flow.id, role.id, users.ids)
+
+    def _cleanup(self, request_id, flow_id, role_id, user_ids):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['approval.request'].browse(request_id).unlink()
+            env['approval.flow'].browse(flow_id).unlink()
+            env['res.groups'].browse(role_id).unlink()
+            env['res.users'].browse(user_ids).unlink()
+
+    def _approve(self, env, key):
+        request = env['approval.request'].with_user(self.user_id).browse(self.request_id)
+        return request.with_context(action_type='approve', idempotency_key=key).process_action()
+
+    def _wait_for_lock_waiter(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.registry.cursor() as cr:
+                cr.execute("SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND NOT granted")
+                if cr.fetchone():
+                    return
+            time.sleep(0.05)
+        self.fail("The second transaction never waited on the transition lock.")
+
+    def test_duplicate_submission_is_retried_and_replayed(self):
+        key = uuid.uuid4().hex
+        snapshot_taken = threading.Event()
+        outcome = {}
+
+        def second_submission():
+            try:
+                with self.registry.cursor() as cr:
+                    # take the snapshot before the first transaction commits
+                    cr.execute("SELECT 1")
+                    snapshot_taken.set()
+                    self._approve(api.Environment(cr, SUPERUSER_ID, {}), key)
+            except Exception as e:
+                outcome['error'] = e
+
+        with self.registry.cursor() as cr:
+            self._approve(api.Environment(cr, SUPERUSER_ID, {}), key)
+            thread = threading.Thread(target=second_submission)
+            thread.start()
+            self.assertTrue(snapshot_taken.wait(10))
+            self._wait_for_lock_waiter()
+        # the first transaction is committed, releasing the lock
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+
+        self.assertIsInstance(outcome.get('error'), CONCURRENCY_ERRORS)
+
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            self.assertTrue(run_with_retry(env, lambda retry_env: self._approve(retry_env, key)))
+            self.assertEqual(env['approval.history'].search_count([
+                ('request_id', '=', self.request_id),
+                ('idempotency_key', '=', key),
+            ]), 1)
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import HttpCase, tagged
+
+from .common import ApprovalCase
+from ..models.approval_export import EXPORT_COLUMNS
+
+
+class TestApprovalExport(ApprovalCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.approver = cls._create_user('approval_export_approver')
+        cls.flow = cls._create_flow('Export Flow')
+        final = cls._create_step(cls.flow, 'Approved', 30, is_final=True)
+        review = cls._create_step(cls.flow, 'Review', 20, next_step=final,
+                                  role_id=cls._create_role('Export Reviewers', cls.approver).id)
+        cls._create_step(cls.flow, 'Submit', 10, next_step=review, is_initiator=True)
+        cls.requests = cls._submit(cls.flow, cls._create_documents(3))
+        cls.domain = [('flow_id', '=', cls.flow.id)]
+
+    def _export(self, fmt, **kwargs):
+        return ''.join(self.env['approval.export'].stream('approval.request', fmt, self.domain, batch_size=2, **kwargs))
+
+    def test_csv_batches(self):
+        rows = list(csv.DictReader(io.StringIO(self._export('csv'))))
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS['approval.request'])
+        self.assertEqual(sorted(int(row['id']) for row in rows), self.requests.ids)
+        self.assertEqual({row['flow'] for row in rows}, {'Export Flow'})
+
+    def test_jsonl_date_filters(self):
+        today = fields.Datetime.now().date()
+        yesterday = today - timedelta(days=1)
+
+        def exported_ids(**kwargs):
+            return sorted(json.loads(line)['id'] for line in self._export('jsonl', **kwargs).splitlines())
+
+        # a bare date includes the whole day, as a string or a datetime
+        self.assertEqual(exported_ids(date_from=str(today), date_to=str(today)), self.requests.ids)
+        self.assertEqual(exported_ids(date_to=fields.Datetime.to_datetime(today)), self.requests.ids)
+        self.assertEqual(exported_ids(date_to=str(yesterday)), [])
+        self.assertEqual(exported_ids(date_from=str(today + timedelta(days=1))), [])
+
+
+@tagged('-at_install', 'post_install')
+class TestApprovalExportController(HttpCase):
+
+    def test_invalid_arguments(self):
+        self.authenticate('admin', 'admin')
+        for query in ('date_from=yesterday', 'date_to=2024-13-40', 'domain=not-json', 'domain={}'):
+            response = self.url_open(f'/approval_central/export/requests?{query}')
+            self.assertEqual(response.status_code, 400, query)
+        self.assertEqual(self.url_open('/approval_central/export/unknown').status_code, 404)
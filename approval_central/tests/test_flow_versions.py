@@ -0,0 +1,58 @@
+from odoo.exceptions import UserError
+
+from .common import ApprovalCase
+
+
+class TestFlowVersions(ApprovalCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.approver = cls._create_user('approval_version_approver')
+        cls.role = cls._create_role('Version Reviewers', cls.approver)
+        cls.flow = cls._create_flow('Versioned Flow')
+        cls.final = cls._create_step(cls.flow, 'Approved', 30, is_final=True)
+        cls.review = cls._create_step(cls.flow, 'Review', 20, next_step=cls.final, role_id=cls.role.id)
+        cls._create_step(cls.flow, 'Submit', 10, next_step=cls.review, is_initiator=True)
+
+    def test_publish_snapshots_steps(self):
+        self.flow.action_publish()
+        version = self.flow.current_version_id
+        self.assertEqual(version.version, 1)
+        self.assertEqual(len(version.step_ids), 3)
+        self.assertEqual(version.step_ids.origin_step_id, self.flow.step_ids)
+        self.assertEqual(version._map_step(self.review.id), version.step_ids.filtered(lambda s: s.origin_step_id == self.review).id)
+        with self.assertRaises(UserError):
+            version.step_ids[0].write({'name': 'Changed'})
+
+        self.flow.action_publish()
+        self.assertEqual(self.flow.current_version_id.version, 2)
+
+    def test_requests_follow_their_version(self):
+        self.flow.action_publish()
+        version = self.flow.current_version_id
+        request = self._submit(self.flow, self._create_documents())
+        self.assertEqual(request.flow_version_id, version)
+        self.assertEqual(request.current_step_id.version_id, version)
+        self.assertEqual(request.current_step_id.origin_step_id, self.review)
+
+        # a live edit adds a step after the review; the pinned request skips it
+        extra = self._create_step(self.flow, 'Extra Review', 25, next_step=self.final, role_id=self.role.id)
+        self.review.action_ids.next_step_id = extra
+        self.flow.action_publish()
+
+        # role members read the pinned version as themselves
+        self._approve(request, self.approver)
+        self.assertEqual(request.status, 'approved')
+
+        newer = self._submit(self.flow, self._create_documents())
+        self.assertEqual(newer.flow_version_id.version, 2)
+        self._approve(newer, self.approver)
+        self.assertEqual(newer.status, 'pending')
+        self.assertEqual(newer.current_step_id.origin_step_id, extra)
+
+    def test_followed_version_cannot_be_deleted(self):
+        self.flow.action_publish()
+        self._submit(self.flow, self._create_documents())
+        with self.assertRaises(UserError):
+            self.flow.current_version_id.unlink()
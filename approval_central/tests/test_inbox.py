@@ -0,0 +1,65 @@
+from odoo.exceptions import UserError
+
+from .common import ApprovalCase
+
+
+class TestInbox(ApprovalCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.approver = cls._create_user('approval_inbox_approver')
+        role = cls._create_role('Inbox Reviewers', cls.approver)
+        cls.flow = cls._create_flow('Inbox Flow')
+        final = cls._create_step(cls.flow, 'Approved', 30, is_final=True)
+        review = cls._create_step(cls.flow, 'Review', 20, next_step=final, role_id=role.id)
+        cls._create_step(cls.flow, 'Submit', 10, next_step=review, is_initiator=True)
+        cls.requests = cls._submit(cls.flow, cls._create_documents(3))
+
+    def _inbox(self, **kwargs):
+        return self.env['approval.request'].with_user(self.approver).get_inbox(**kwargs)
+
+    def _flush_versions(self):
+        self.env.cr.precommit.run()
+
+    def test_keyset_pages(self):
+        self.assertEqual(set(self.requests.mapped('status')), {'pending'})
+        first = self._inbox(limit=2)
+        self.assertEqual(len(first['items']), 2)
+        self.assertTrue(first['next_cursor'])
+
+        second = self._inbox(limit=2, cursor=first['next_cursor'])
+        self.assertEqual(len(second['items']), 1)
+        self.assertFalse(second['next_cursor'])
+
+        # same entry time: pages are ordered and cut on the id
+        ids = [item['id'] for item in first['items'] + second['items']]
+        self.assertEqual(ids, sorted(self.requests.ids, reverse=True))
+
+    def test_etag(self):
+        self._flush_versions()
+        first = self._inbox()
+        self.assertFalse(first['not_modified'])
+        self.assertEqual(self._inbox(etag=first['etag']), {'not_modified': True, 'etag': first['etag']})
+
+        self._approve(self.requests[0], self.approver)
+        self._flush_versions()
+        changed = self._inbox(etag=first['etag'])
+        self.assertFalse(changed['not_modified'])
+        self.assertEqual(len(changed['items']), 2)
+
+    def test_unlink_bumps_version(self):
+        self._flush_versions()
+        Version = self.env['approval.inbox.version']
+        version = Version._get_version(self.approver.id)
+        self.requests[0].unlink()
+        self._flush_versions()
+        self.assertEqual(Version._get_version(self.approver.id), version + 1)
+
+    def test_malformed_arguments(self):
+        for cursor in ('garbage', 'yesterday,1', '2024-01-01 00:00:00,x'):
+            with self.assertRaises(UserError):
+                self._inbox(cursor=cursor)
+        for limit in ('many', 0, None):
+            with self.assertRaises(UserError):
+                self._inbox(limit=limit)
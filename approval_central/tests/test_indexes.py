@@ -0,0 +1,52 @@
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase
+from odoo.tools import sql
+
+from .common import ApprovalCase
+from ..models.approval_indexes import APPROVAL_INDEXES, APPROVAL_UNIQUE_INDEXES, check_approval_indexes
+
+
+class TestApprovalIndexes(TransactionCase):
+
+    def test_indexes_created(self):
+        for name, table, __, __ in APPROVAL_INDEXES + APPROVAL_UNIQUE_INDEXES:
+            if table.startswith('approval_'):
+                self.assertTrue(sql.index_exists(self.env.cr, name), f"Index {name} is missing")
+        report = check_approval_indexes(self.env.cr)
+        self.assertFalse([name for name in report['missing'] if name.startswith('approval_request')])
+
+    def test_missing_index_reported_and_recreated(self):
+        self.env.cr.execute('DROP INDEX approval_request_current_step_idx')
+        self.assertIn('approval_request_current_step_idx', check_approval_indexes(self.env.cr)['missing'])
+        self.env['approval.request'].init()
+        self.assertTrue(sql.index_exists(self.env.cr, 'approval_request_current_step_idx'))
+
+
+class TestSinglePendingRequest(ApprovalCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.approver = cls._create_user('approval_pending_approver')
+        cls.flow = cls._create_flow('Single Pending Flow')
+        final = cls._create_step(cls.flow, 'Approved', 30, is_final=True)
+        review = cls._create_step(cls.flow, 'Review', 20, next_step=final, role_id=cls._create_role('Pending Reviewers', cls.approver).id)
+        cls._create_step(cls.flow, 'Submit', 10, next_step=review, is_initiator=True)
+
+    def test_second_pending_request_refused(self):
+        document = self._create_documents()
+        request = self._submit(self.flow, document)
+        with self.assertRaises(UserError):
+            self._submit(self.flow, document)
+
+        # once the first one is closed the document can be submitted again
+        request.status = 'rejected'
+        retry = self._submit(self.flow, document)
+        with self.assertRaises(UserError):
+            request.status = 'pending'
+        self.assertEqual(retry.status, 'pending')
+
+    def test_duplicate_documents_in_one_batch_refused(self):
+        document = self._create_documents()
+        with self.assertRaises(UserError):
+            self._submit(self.flow, document + document)
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+from .common import ApprovalCase
+
+
+class TestParallelBranches(ApprovalCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reviewer = cls._create_user('approval_split_reviewer')
+        cls.finance = cls._create_user('approval_split_finance')
+        cls.legal = cls._create_user('approval_split_legal')
+        cls.director = cls._create_user('approval_split_director')
+
+        cls.flow = cls._create_flow('Parallel Flow')
+        cls.final = cls._create_step(cls.flow, 'Approved', 70, is_final=True)
+        cls.join = cls._create_step(cls.flow, 'Director', 60, next_step=cls.final,
+                                    role_id=cls._create_role('Split Directors', cls.director).id)
+        cls.branch_finance = cls._create_step(cls.flow, 'Finance', 40, next_step=cls.join,
+                                              role_id=cls._create_role('Split Finance', cls.finance).id)
+        cls.branch_legal = cls._create_step(cls.flow, 'Legal', 50, next_step=cls.join,
+                                            role_id=cls._create_role('Split Legal', cls.legal).id)
+        cls.split = cls._create_step(cls.flow, 'Split', 30, is_parallel_split=True, join_step_id=cls.join.id,
+                                     next_step_ids=[(6, 0, (cls.branch_finance | cls.branch_legal).ids)])
+        cls.review = cls._create_step(cls.flow, 'Review', 20, next_step=cls.split,
+                                      role_id=cls._create_role('Split Reviewers', cls.reviewer).id)
+        cls._create_step(cls.flow, 'Submit', 10, next_step=cls.review, is_initiator=True)
+
+    def _count_join_entries(self):
+        """Patch ``write`` and return the list of request ids recorded each
+        time requests are moved to the join step."""
+        entries = []
+        Request = type(self.env['approval.request'])
+        write = Request.write
+
+        def counting_write(records, vals):
+            if vals.get('current_step_id') == self.join.id:
+                entries.append(records.ids)
+            return write(records, vals)
+
+        patcher = patch.object(Request, 'write', counting_write)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return entries
+
+    def test_split_branches_join(self):
+        request = self._submit(self.flow, self._create_documents())
+        self.assertEqual(request.current_step_id, self.review)
+
+        # approving a normal step whose next step is the split starts the branches
+        self._approve(request, self.reviewer)
+        self.assertEqual(request.current_step_id, self.split)
+        self.assertEqual(request.branches_remaining, 2)
+        self.assertEqual(request.branch_ids.step_id, self.branch_finance | self.branch_legal)
+        self.assertEqual(set(request.branch_ids.mapped('state')), {'pending'})
+        self.assertEqual(request.approver_ids, self.finance | self.legal)
+
+        entries = self._count_join_entries()
+        self._approve(request, self.finance)
+        self.assertEqual(request.current_step_id, self.split)
+        self.assertEqual(request.branches_remaining, 1)
+        self.assertEqual(request.approver_ids, self.legal)
+        self.assertFalse(entries)
+
+        self._approve(request, self.legal)
+        self.assertEqual(request.branches_remaining, 0)
+        self.assertEqual(request.current_step_id, self.join)
+        self.assertEqual(request.approver_ids, self.director)
+        self.assertEqual(set(request.branch_ids.mapped('state')), {'done'})
+        self.assertIn(self.split, request.completed_step_ids)
+        self.assertEqual(entries, [request.ids])
+
+        self._approve(request, self.director)
+        self.assertEqual(request.status, 'approved')
+
+    def test_required_branches_cancels_the_others(self):
+        self.split.required_branches = 1
+        request = self._submit(self.flow, self._create_documents())
+        self._approve(request, self.reviewer)
+        self.assertEqual(request.branches_remaining, 1)
+
+        entries = self._count_join_entries()
+        self._approve(request, self.legal)
+        self.assertEqual(request.branches_remaining, 0)
+        self.assertEqual(request.current_step_id, self.join)
+        cancelled = request.branch_ids.filtered(lambda b: b.state == 'cancelled')
+        self.assertEqual(cancelled.step_id, self.branch_finance)
+        self.assertEqual(request.branch_ids.filtered(lambda b: b.state == 'done').step_id, self.join)
+        self.assertEqual(entries, [request.ids])
@@ -1 +1,4 @@
 from . import notification
+from . import concurrency
+from . import instrumentation
+from . import tracing
@@ -0,0 +1,53 @@
+import logging
+import random
+import time
+
+from psycopg2 import errors, errorcodes
+
+_logger = logging.getLogger(__name__)
+
+
+class TransitionConflict(errors.SerializationFailure):
+    """A concurrent transaction committed the same transition first.
+
+    Raised when the history row of a transition hits the idempotency key of
+    a row committed after the current snapshot was taken: the transaction
+    waited on the transition lock with a stale snapshot and must be retried,
+    when the replay is detected. Being a ``SerializationFailure``, it is
+    retried by Odoo for HTTP and RPC calls (``process_decisions`` included)
+    and by ``run_with_retry``, which the approval crons run under; other
+    callers, such as scripts, must retry it themselves.
+    """
+    pgcode = errorcodes.SERIALIZATION_FAILURE
+
+
+CONCURRENCY_ERRORS = (
+    errors.SerializationFailure,
+    errors.DeadlockDetected,
+    errors.LockNotAvailable,
+)
+
+
+def run_with_retry(env, func, max_tries=5):
+    """Run ``func(env)`` in its own transaction and commit it.
+
+    On serialization failures, deadlocks and lock timeouts the transaction
+    is rolled back and retried with a fresh cursor (hence a fresh snapshot),
+    up to ``max_tries`` times with a randomized backoff. ``func`` should
+    return plain data: its records are bound to a cursor closed on return.
+    It may commit along the way as long as a new run resumes the work,
+    like the chunked maintenance methods that query what is left to do.
+    """
+    for attempt in range(1, max_tries + 1):
+        try:
+            with env.registry.cursor() as cr:
+                return func(env(cr=cr))
+        except CONCURRENCY_ERRORS as e:
+            if attempt == max_tries:
+                raise
+            wait = random.uniform(0.0, 0.1 * 2 ** attempt)
+            _logger.info(
+                "%s, retrying transaction in %.3fs (attempt %s/%s).",
+                type(e).__name__, wait, attempt, max_tries,
+            )
+            time.sleep(wait)
@@ -0,0 +1,201 @@
+"""Per-transition counters of the approval engine.
+
+A transition (an action on a request, or an automatic advance of a batch
+of requests) is split into phases; for each phase the number of SQL
+queries, the time spent and the rows written are counted. Time and queries
+are exclusive: a phase nested in another one is not counted twice.
+
+Counters are only collected when they are used: when this module's logger
+is at DEBUG level (one structured line per transition), when the
+transition is sampled into ``approval.transition.sample``
+(``approval_central.transition_sample_rate``, between 0 and 1), or inside
+``assert_query_budget``. Sampled span traces are handled by ``tracing``.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from . import tracing
+
+_logger = logging.getLogger(__name__)
+_local = threading.local()
+
+SAMPLE_RATE_PARAM = 'approval_central.transition_sample_rate'
+
+PHASES = ('step_resolution', 'conditions', 'org_chart', 'history', 'activities', 'write', 'other')
+
+
+class TransitionMetrics:
+    """Counters of one transition, filled through ``phase``."""
+
+    def __init__(self, cr, kind, request_ids, sampled=False):
+        self.cr = cr
+        self.kind = kind
+        self.request_ids = list(request_ids)
+        self.sampled = sampled
+        self.phases = {}
+        self.queries = 0
+        self.duration_ms = 0.0
+        self.rows = 0
+        self._start = (time.perf_counter(), cr.sql_log_count)
+        self._stack = [['other', *self._start]]
+
+    def _counter(self, name):
+        return self.phases.setdefault(name, {'queries': 0, 'ms': 0.0, 'rows': 0})
+
+    def _settle(self):
+        """Charge the innermost phase with what happened since its mark."""
+        frame = self._stack[-1]
+        now, queries = time.perf_counter(), self.cr.sql_log_count
+        counter = self._counter(frame[0])
+        counter['ms'] += (now - frame[1]) * 1000
+        counter['queries'] += queries - frame[2]
+        frame[1:] = [now, queries]
+
+    def enter(self, name):
+        self._settle()
+        self._stack.append([name, time.perf_counter(), self.cr.sql_log_count])
+
+    def leave(self):
+        self._settle()
+        self._stack.pop()
+        self._stack[-1][1:] = [time.perf_counter(), self.cr.sql_log_count]
+
+    def add_rows(self, count):
+        self._counter(self._stack[-1][0])['rows'] += count
+
+    def finish(self):
+        self._settle()
+        self.duration_ms = (time.perf_counter() - self._start[0]) * 1000
+        self.queries = self.cr.sql_log_count - self._start[1]
+        self.rows = sum(counter['rows'] for counter in self.phases.values())
+        for counter in self.phases.values():
+            counter['ms'] = round(counter['ms'], 3)
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'requests': self.request_ids,
+            'queries': self.queries,
+            'ms': round(self.duration_ms, 3),
+            'rows': self.rows,
+            'phases': {name: self.phases[name] for name in PHASES if name in self.phases},
+        }
+
+
+def current():
+    """The metrics of the transition running in this thread, if collected."""
+    return getattr(_local, 'metrics', None)
+
+
+def _budgets():
+    return getattr(_local, 'budgets', [])
+
+
+def _sample_rate(env):
+    try:
+        return float(env['ir.config_parameter'].sudo().get_param(SAMPLE_RATE_PARAM) or 0)
+    except ValueError:
+        return 0.0
+
+
+@contextmanager
+def transition(env, kind, requests):
+    """Collect the counters of the transition run inside the block.
+
+    Transitions started inside another one (e.g. the condition steps
+    followed by an approval) are counted as part of it. Deferred writes
+    are flushed at the end, in the ``write`` phase, so that their queries
+    are counted too. Nothing is reported for a transition that fails,
+    except its trace.
+    """
+    if getattr(_local, 'active', False):
+        yield current()
+        return
+    sampled = random.random() < _sample_rate(env)
+    collect = sampled or _budgets() or _logger.isEnabledFor(logging.DEBUG)
+    metrics = TransitionMetrics(env.cr, kind, requests.ids, sampled) if collect else None
+    trace = tracing.start(env, kind, requests)
+    _local.active, _local.metrics = True, metrics
+    try:
+        yield metrics
+        if metrics or trace:
+            with phase('write'):
+                env.flush_all()
+    except Exception as e:
+        if trace:
+            tracing.finish(env, trace, requests, error=e)
+        raise
+    finally:
+        _local.active, _local.metrics = False, None
+    if trace:
+        tracing.finish(env, trace, requests)
+    if not metrics:
+        return
+    metrics.finish()
+
+    _logger.debug("approval transition %s", json.dumps(metrics.as_dict()))
+    for recorded in _budgets():
+        recorded.append(metrics)
+    if sampled:
+        env['approval.transition.sample'].sudo()._record(metrics)
+
+
+@contextmanager
+def phase(name):
+    """Count what runs inside the block in phase ``name`` of the current
+    transition, and as a span of its trace."""
+    metrics = current()
+    with tracing.span(name):
+        if metrics is None:
+            yield
+            return
+        metrics.enter(name)
+        try:
+            yield
+        finally:
+            metrics.leave()
+
+
+def add_rows(count):
+    """Count ``count`` rows written in the current phase."""
+    metrics = current()
+    if metrics is not None:
+        metrics.add_rows(count)
+
+
+@contextmanager
+def assert_query_budget(max_queries, phases=None):
+    """Fail when a transition run inside the block exceeds ``max_queries``
+    SQL queries, or the query budget of one of ``phases`` ({phase: max}).
+    Meant for tests::
+
+        with assert_query_budget(40, {'org_chart': 10}):
+            request.with_context(action_type='approve').process_action()
+
+    Yields the list of collected ``TransitionMetrics``.
+    """
+    recorded = []
+    previous = _budgets()
+    _local.budgets = previous + [recorded]
+    try:
+        yield recorded
+    finally:
+        _local.budgets = previous
+
+    for metrics in recorded:
+        if metrics.queries > max_queries:
+            raise AssertionError(
+                f"Transition {metrics.kind} on requests {metrics.request_ids} ran {metrics.queries} "
+                f"queries, over the budget of {max_queries}: {json.dumps(metrics.as_dict()['phases'])}"
+            )
+        for name, limit in (phases or {}).items():
+            used = metrics.phases.get(name, {}).get('queries', 0)
+            if used > limit:
+                raise AssertionError(
+                    f"Transition {metrics.kind} on requests {metrics.request_ids} ran {used} "
+                    f"queries in phase {name}, over the budget of {limit}."
+                )
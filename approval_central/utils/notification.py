@@ -1,17 +1,60 @@
+from collections import defaultdict
+
 from odoo import api
 
+QUEUE_KEY = 'approval_central.notifications'
+
+
 def send_notification_to_users(env, users, message, title='Approval Required'):
-    bus = env['bus.bus']
-    for user in users:
+    send_notifications(env, [(user, message, title) for user in users])
+
+
+def send_notifications(env, notifications, coalesce=False):
+    """Send ``(user, message, title)`` notifications on the bus.
+
+    Messages are grouped per partner channel, and partners getting the
+    same message are sent it with one ``_bus_send``; the bus writes all the
+    notifications of the transaction at once, before commit. With
+    ``coalesce``, a partner receiving several messages gets a single "N
+    approvals waiting" notification instead of one sticky popup per message.
+    """
+    messages_by_partner = defaultdict(list)
+    for user, message, title in notifications:
         if not user or not user.partner_id:
             continue
-        bus.sendone(
-            (env.cr.dbname, 'res.partner', user.partner_id.id),
-            {
-                'type': 'simple_notification',
-                'title': title,
-                'message': message,
-                'sticky': True,
-                'tag': 'approval_notification',
-            }
-        )
+        messages_by_partner[user.partner_id].append((title, message))
+
+    partners_by_message = defaultdict(lambda: env['res.partner'])
+    for partner, messages in messages_by_partner.items():
+        if coalesce and len(messages) > 1:
+            messages = [('Approvals Waiting', f"{len(messages)} approvals waiting for your action.")]
+        for title, message in messages:
+            partners_by_message[title, message] |= partner
+
+    for (title, message), partners in partners_by_message.items():
+        partners._bus_send('simple_notification', {
+            'title': title,
+            'message': message,
+            'sticky': True,
+            'tag': 'approval_notification',
+        })
+
+
+def queue_notification_to_users(env, users, message, title='Approval Required'):
+    """Buffer notifications until the transaction commits.
+
+    Everything queued during the transaction is the coalescing window: it
+    is sent right before commit, one notification per partner.
+    """
+    data = env.cr.precommit.data
+    queue = data.get(QUEUE_KEY)
+    if queue is None:
+        queue = data[QUEUE_KEY] = []
+        env.cr.precommit.add(lambda: _flush_queued_notifications(env))
+    queue.extend((user, message, title) for user in users)
+
+
+def _flush_queued_notifications(env):
+    queue = env.cr.precommit.data.pop(QUEUE_KEY, [])
+    if queue:
+        send_notifications(env, queue, coalesce=True)
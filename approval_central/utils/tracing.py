@@ -0,0 +1,145 @@
+"""Opt-in span traces of approval engine transitions.
+
+A sampled transition records a tree of spans: the phases of
+``instrumentation`` and, inside them, every condition evaluated with its
+result, the org-chart and branch candidates tried or skipped and the
+delegates added to the approvers. The final step, status and approvers
+of the requests are added when the transition ends.
+
+Tracing is off unless ``approval_central.trace_sample_rate`` (between 0
+and 1) is set. Traces are appended as JSON lines to the file named by
+``approval_central.trace_path``, or stored in ``approval.transition.trace``
+when no path is set. Only the file keeps traces of failed transitions:
+table rows are rolled back with them.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+_local = threading.local()
+_file_lock = threading.Lock()
+
+TRACE_RATE_PARAM = 'approval_central.trace_sample_rate'
+TRACE_PATH_PARAM = 'approval_central.trace_path'
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'start', 'duration_ms', 'children')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.children = []
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def close(self):
+        self.duration_ms = round((time.perf_counter() - self.start) * 1000, 3)
+
+    def as_dict(self):
+        data = {'name': self.name}
+        if self.duration_ms is not None:
+            data['ms'] = self.duration_ms
+        if self.attrs:
+            data['attrs'] = self.attrs
+        if self.children:
+            data['children'] = [child.as_dict() for child in self.children]
+        return data
+
+
+class _NullSpan:
+    """Stands for a span when nothing is traced."""
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    def __init__(self, kind, request_ids, path=None):
+        self.root = Span('transition', {'kind': kind, 'requests': list(request_ids)})
+        self.stack = [self.root]
+        self.path = path
+
+
+def current():
+    return getattr(_local, 'trace', None)
+
+
+def _param(env, name):
+    return env['ir.config_parameter'].sudo().get_param(name)
+
+
+def start(env, kind, requests):
+    """Start tracing a transition if it is sampled; return the trace."""
+    try:
+        rate = float(_param(env, TRACE_RATE_PARAM) or 0)
+    except ValueError:
+        rate = 0.0
+    if not rate or random.random() >= rate:
+        return None
+    # read now: the transaction may be aborted when the trace is exported
+    _local.trace = Trace(kind, requests.ids, _param(env, TRACE_PATH_PARAM))
+    return _local.trace
+
+
+def finish(env, trace, requests, error=None):
+    """Close ``trace``, record where ``requests`` ended up and export it."""
+    _local.trace = None
+    root = trace.root
+    root.close()
+    root.set(user_id=env.uid)
+    if error is not None:
+        root.set(error=f"{type(error).__name__}: {error}")
+    else:
+        root.set(final=[{
+            'request_id': req.id,
+            'step_id': req.current_step_id.id,
+            'status': req.status,
+            'approver_ids': req.approver_ids.ids,
+        } for req in requests])
+    data = root.as_dict()
+
+    if trace.path:
+        try:
+            line = json.dumps(data, default=str)
+            with _file_lock, open(trace.path, 'a') as f:
+                f.write(line + '\n')
+        except OSError:
+            _logger.warning("Could not write approval trace to %s", trace.path, exc_info=True)
+    elif error is None:
+        env['approval.transition.trace'].sudo()._record(data)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Record the block as a child span of the current one. Yields the
+    span, or a no-op stand-in when the transition is not traced."""
+    trace = current()
+    if trace is None:
+        yield NULL_SPAN
+        return
+    child = Span(name, attrs)
+    trace.stack[-1].children.append(child)
+    trace.stack.append(child)
+    try:
+        yield child
+    finally:
+        child.close()
+        trace.stack.pop()
+
+
+def event(name, **attrs):
+    """Record a point-in-time span under the current one."""
+    trace = current()
+    if trace is not None:
+        trace.stack[-1].children.append(Span(name, attrs))
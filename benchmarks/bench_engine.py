@@ -0,0 +1,138 @@
+"""Micro-benchmarks of the approval engine.
+
+Builds a synthetic organization and flow inside one transaction, times the
+engine entry points with wall time and SQL query counts, then rolls
+everything back. Results are written as JSON so runs can be compared::
+
+    python benchmarks/bench_engine.py --documents 500 --output after.json \
+        --compare before.json -- -c odoo.conf -d bench
+"""
+import argparse
+import platform
+from datetime import datetime
+
+import odoo
+
+from common import (
+    Fixtures, Recorder, bootstrap, check_engine_fields, compare_results,
+    git_revision, save_results, superuser_env,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=200, help="requests per batch benchmark")
+    parser.add_argument('--steps', type=int, default=6, help="approval steps per flow")
+    parser.add_argument('--condition-steps', type=int, default=2, help="length of the condition ladder")
+    parser.add_argument('--conditions-per-step', type=int, default=4)
+    parser.add_argument('--committee-every', type=int, default=3, help="every n-th approval step is a committee (0: none)")
+    parser.add_argument('--org-every', type=int, default=2, help="every n-th approval step is an org-chart step (0: none)")
+    parser.add_argument('--users-per-job', type=int, default=5)
+    parser.add_argument('--job-depth', type=int, default=4)
+    parser.add_argument('--groups', type=int, default=6)
+    parser.add_argument('--delegations', type=int, default=5)
+    parser.add_argument('--output', default='bench_output.json', help="where to write the JSON results")
+    parser.add_argument('--compare', help="previous JSON results to compare against")
+    args, odoo_args = parser.parse_known_args()
+    return args, [arg for arg in odoo_args if arg != '--']
+
+
+def new_requests(env, flow, documents):
+    """Requests sitting on the initiator step, not routed yet.
+
+    ``documents`` must not have a pending request of ``flow`` already:
+    there is at most one per document and flow."""
+    initiator = flow.step_ids.filtered('is_initiator')
+    return env['approval.request'].create([{
+        'flow_id': flow.id,
+        'res_model': documents._name,
+        'res_id': document.id,
+        'module_name': 'benchmark',
+        'current_step_id': initiator.id,
+    } for document in documents])
+
+
+def run(env, args, recorder):
+    fixtures = Fixtures(
+        env, users_per_job=args.users_per_job, job_depth=args.job_depth,
+        groups=args.groups, delegations=args.delegations,
+    ).build()
+    flow = fixtures.build_flow(
+        steps=args.steps, condition_steps=args.condition_steps,
+        conditions_per_step=args.conditions_per_step,
+        committee_every=args.committee_every, org_every=args.org_every,
+    )
+    documents = fixtures.build_documents(args.documents)
+    # requests are created by the requester, whose employee anchors the org chart
+    requester_env = env(user=fixtures.requester, su=True)
+    Request = requester_env['approval.request']
+    env.invalidate_all()
+
+    with recorder.measure('create_for_documents', args.documents):
+        routed = Request.create_for_documents(flow, documents, module_name='benchmark')
+
+    pending = new_requests(requester_env, flow, fixtures.build_documents(args.documents))
+    env.invalidate_all()
+    with recorder.measure('auto_process_initiator_step', len(pending)):
+        for req in pending:
+            req.auto_process_initiator_step()
+
+    ladder = flow.step_ids.filtered('is_condition').sorted('sequence')[:1]
+    if ladder:
+        env.invalidate_all()
+        with recorder.measure('auto_process_condition_steps', len(pending)):
+            for req in pending:
+                req.auto_process_condition_steps(ladder)
+
+    org_step = flow.step_ids.filtered('is_organization').sorted('sequence')[:1]
+    if org_step:
+        env.invalidate_all()
+        with recorder.measure('_check_org_chart', len(pending)):
+            for req in pending:
+                req._check_org_chart(org_step)
+
+    routed = routed.filtered(lambda r: r.status == 'pending' and r.approver_ids)
+    env.invalidate_all()
+    with recorder.measure('process_action (approve)', len(routed) or 1):
+        for req in routed:
+            approver = req.approver_ids[0]
+            req.with_user(approver).sudo().with_context(action_type='approve').process_action()
+
+    all_requests = routed | pending
+    env.invalidate_all()
+    with recorder.measure('_compute_step_progress', len(all_requests) or 1):
+        all_requests.mapped('step_progress')
+
+    env.invalidate_all()
+    with recorder.measure('dashboard view', 1):
+        env['dashboard.approval.request'].search_read([], ['res_model', 'module_name', 'status', 'count'])
+
+
+def main():
+    args, odoo_args = parse_args()
+    registry = bootstrap(odoo_args)
+    with registry.cursor() as cr:
+        env = superuser_env(cr)
+        check_engine_fields(env)
+        recorder = Recorder(env)
+        try:
+            run(env, args, recorder)
+        finally:
+            cr.rollback()
+
+    meta = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'database': registry.db_name,
+        'odoo': odoo.release.version,
+        'python': platform.python_version(),
+        'revision': git_revision(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+    }
+    save_results(args.output, meta, recorder.results)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare_results(args.compare, recorder.results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""Shared helpers for the approval engine benchmarks.
+
+The scripts in this directory run against a real database where
+``approval_central`` (and the modules providing its ``hr`` and branch fields)
+is installed. Everything after ``--`` on their command line is handed to
+Odoo's own option parser, e.g.::
+
+    python benchmarks/bench_engine.py --documents 500 -- -c odoo.conf -d bench
+"""
+import json
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import odoo
+from odoo import api, SUPERUSER_ID
+
+
+def bootstrap(odoo_args):
+    """Parse Odoo options and return the registry of the selected database."""
+    odoo.tools.config.parse_config(odoo_args)
+    db_name = odoo.tools.config['db_name']
+    if not db_name:
+        raise SystemExit("No database given; pass Odoo options after '--', e.g. -- -d mydb")
+    if isinstance(db_name, list):
+        db_name = db_name[0]
+    return odoo.modules.registry.Registry(db_name.split(',')[0])
+
+
+def superuser_env(cr):
+    return api.Environment(cr, SUPERUSER_ID, {})
+
+
+class Recorder:
+    """Collect wall time and SQL query counts of measured blocks."""
+
+    def __init__(self, env):
+        self.env = env
+        self.results = []
+
+    @contextmanager
+    def measure(self, name, iterations=1):
+        self.env.flush_all()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        wall = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+        self.results.append({
+            'name': name,
+            'iterations': iterations,
+            'wall_ms': round(wall * 1000, 3),
+            'wall_ms_per_iteration': round(wall * 1000 / iterations, 3),
+            'queries': queries,
+            'queries_per_iteration': round(queries / iterations, 2),
+        })
+        print(f"{name:<40} {iterations:>6} it  {wall * 1000:>10.1f} ms  "
+              f"{wall * 1000 / iterations:>8.2f} ms/it  {queries:>7} q  {queries / iterations:>7.1f} q/it")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def save_results(path, meta, results):
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, default=str)
+
+
+def compare_results(previous_path, results):
+    """Print per-iteration deltas against a previous results file."""
+    with open(previous_path) as f:
+        previous = {r['name']: r for r in json.load(f)['results']}
+    print(f"\nCompared to {previous_path}:")
+    for result in results:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        time_delta = result['wall_ms_per_iteration'] - before['wall_ms_per_iteration']
+        query_delta = result['queries_per_iteration'] - before['queries_per_iteration']
+        print(f"{result['name']:<40} {time_delta:>+10.2f} ms/it  {query_delta:>+8.1f} q/it")
+
+
+def check_engine_fields(env):
+    """The engine reads fields provided by companion modules; fail early when
+    they are missing instead of inside a transition."""
+    missing = [
+        f"{model}.{field}" for model, field in (
+            ('res.users', 'default_branch_id'),
+            ('hr.employee', 'branch_id'),
+            ('hr.job', 'parent_id'),
+        )
+        if model not in env or field not in env[model]._fields
+    ]
+    if missing:
+        raise SystemExit(f"The approval engine needs fields that are not installed: {', '.join(missing)}")
+
+
+class Fixtures:
+    """Synthetic users, groups, job hierarchy, delegations and flows.
+
+    ``requester`` sits at the bottom of a job chain of ``job_depth`` levels,
+    each level staffed with ``users_per_job`` users. Approval steps use
+    ``groups`` role groups drawn from those users, so organization steps
+    always find a hierarchy match.
+    """
+
+    def __init__(self, env, users_per_job=5, job_depth=4, groups=6, delegations=5, prefix='bench'):
+        self.env = env
+        self.prefix = prefix
+        self.users_per_job = users_per_job
+        self.job_depth = job_depth
+        self.group_count = groups
+        self.delegation_count = delegations
+        self.approve = env.ref('approval_central.approval_action_approve')
+        self.users_by_level = []
+        self.groups = env['res.groups']
+        self.requester = env['res.users']
+
+    def build(self):
+        self._build_hierarchy()
+        self._build_groups()
+        self._build_delegations()
+        return self
+
+    def _create_user(self, login):
+        return self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': login,
+            'login': login,
+            'groups_id': [(6, 0, [
+                self.env.ref('base.group_user').id,
+                self.env.ref('approval_central.group_approval').id,
+                self.env.ref('approval_central.group_approval_user').id,
+            ])],
+        })
+
+    def _build_hierarchy(self):
+        parent_job = self.env['hr.job']
+        jobs = []
+        for level in range(self.job_depth, 0, -1):
+            parent_job = self.env['hr.job'].create({'name': f'{self.prefix} job {level}', 'parent_id': parent_job.id})
+            jobs.insert(0, parent_job)
+
+        for level, job in enumerate(jobs):
+            users = self.env['res.users']
+            for index in range(self.users_per_job):
+                users |= self._create_user(f'{self.prefix}_l{level}_u{index}')
+            self.env['hr.employee'].create([
+                {'name': user.name, 'user_id': user.id, 'job_id': job.id} for user in users
+            ])
+            self.users_by_level.append(users)
+
+        self.requester = self._create_user(f'{self.prefix}_requester')
+        self.env['hr.employee'].create({
+            'name': self.requester.name,
+            'user_id': self.requester.id,
+            'job_id': jobs[0].id,
+        })
+
+    def _build_groups(self):
+        category = self.env.ref('approval_central.module_category_approval')
+        for index in range(self.group_count):
+            users = self.users_by_level[index % len(self.users_by_level)]
+            self.groups |= self.env['res.groups'].create({
+                'name': f'{self.prefix} role {index}',
+                'category_id': category.id,
+                'users': [(6, 0, users.ids)],
+            })
+
+    def _build_delegations(self):
+        all_users = self.env['res.users'].union(*self.users_by_level)
+        today = date.today()
+        self.env['approval.delegate'].create([{
+            'original_user_id': all_users[index].id,
+            'delegate_user_id': all_users[-index - 1].id,
+            'start_date': today - timedelta(days=1),
+            'end_date': today + timedelta(days=30),
+        } for index in range(min(self.delegation_count, len(all_users) // 2))])
+
+    def build_flow(self, steps=6, condition_steps=2, conditions_per_step=4,
+                   committee_every=3, org_every=2, name='bench flow'):
+        """Create a flow: initiator → condition ladder → ``steps`` approval
+        steps (committee every ``committee_every``-th, organization every
+        ``org_every``-th, static otherwise) → final step.
+
+        The ladder compares the target partner id against thresholds, so
+        routing really evaluates every condition of every ladder step.
+        """
+        Step = self.env['approval.step']
+        flow = self.env['approval.flow'].create({
+            'name': name,
+            'request_type': 'benchmark',
+            'request_model_id': self.env['ir.model']._get('res.partner').id,
+        })
+        sequence = iter(range(10, 10000, 10))
+        sequences = {
+            'initiator': next(sequence),
+            'ladder': [next(sequence) for __ in range(condition_steps)],
+            'steps': [next(sequence) for __ in range(steps)],
+            'final': next(sequence),
+        }
+
+        next_step = Step.create({
+            'flow_id': flow.id, 'name': 'Final', 'sequence': sequences['final'], 'is_final': True,
+        })
+        for index in range(steps - 1, -1, -1):
+            next_step = Step.create({
+                'flow_id': flow.id,
+                'name': f'Approval {index + 1}',
+                'sequence': sequences['steps'][index],
+                'role_id': self.groups[index % len(self.groups)].id,
+                'committee_approval': bool(committee_every) and index % committee_every == committee_every - 1,
+                'required_approval_percent': 50.0,
+                'is_organization': bool(org_every) and index % org_every == org_every - 1,
+                'action_ids': [(0, 0, {'action_id': self.approve.id, 'next_step_id': next_step.id})],
+            })
+        for index in range(condition_steps - 1, -1, -1):
+            next_step = Step.create({
+                'flow_id': flow.id,
+                'name': f'Condition {index + 1}',
+                'sequence': sequences['ladder'][index],
+                'is_condition': True,
+                'condition_ids': [(0, 0, {
+                    'field_to_check': 'custom_field',
+                    'custom_field_name': 'id',
+                    'operator': '>=',
+                    # thresholds no partner reaches, then a catch-all
+                    'value': str(10 ** 9 - rank) if rank < conditions_per_step - 1 else '0',
+                    'sequence': rank,
+                    'next_step_id': next_step.id,
+                }) for rank in range(conditions_per_step)],
+            })
+        Step.create({
+            'flow_id': flow.id,
+            'name': 'Initiator',
+            'sequence': sequences['initiator'],
+            'is_initiator': True,
+            'next_step_ids': [(6, 0, [next_step.id])],
+        })
+        return flow
+
+    def build_documents(self, count):
+        return self.env['res.partner'].create([{'name': f'bench document {index}'} for index in range(count)])
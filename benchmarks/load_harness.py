@@ -0,0 +1,203 @@
+"""Concurrent load harness for committee steps and shared inboxes.
+
+Unlike bench_engine.py, this script commits its fixtures so that worker
+threads, each with its own cursor, can see them: run it against a
+throwaway database. Every run uses its own login prefix.
+
+Scenarios:
+
+``committee``
+    a few requests on a committee step; every approver of every request
+    approves, and items are interleaved so approvers hit the same request
+    at the same time.
+``spread``
+    many requests, one approval each: contention comes from shared
+    approvers and inbox rows, not from the requests themselves.
+
+Example::
+
+    python benchmarks/load_harness.py --scenario committee --threads 16 -- -c odoo.conf -d loadtest
+"""
+import argparse
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import odoo
+from odoo import api
+from odoo.exceptions import UserError
+
+from common import Fixtures, bootstrap, check_engine_fields, git_revision, save_results, superuser_env
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=['committee', 'spread'], default='committee')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=5, help="requests to approve")
+    parser.add_argument('--approvers', type=int, default=20, help="users in the committee group")
+    parser.add_argument('--required-percent', type=float, default=100.0)
+    parser.add_argument('--max-tries', type=int, default=5, help="attempts per item on concurrency errors")
+    parser.add_argument('--lock-sample-interval', type=float, default=0.05, help="seconds between pg_locks samples")
+    parser.add_argument('--output', default='load_output.json')
+    args, odoo_args = parser.parse_known_args()
+    return args, [arg for arg in odoo_args if arg != '--']
+
+
+def setup(registry, args, prefix):
+    """Commit the fixtures and return the work items (request id, user id)."""
+    with registry.cursor() as cr:
+        env = superuser_env(cr)
+        check_engine_fields(env)
+        fixtures = Fixtures(
+            env, users_per_job=args.approvers, job_depth=1, groups=1, delegations=0, prefix=prefix,
+        ).build()
+        flow = fixtures.build_flow(
+            steps=1, condition_steps=0, committee_every=1 if args.scenario == 'committee' else 0,
+            org_every=0, name=f'{prefix} flow',
+        )
+        flow.step_ids.filtered('committee_approval').required_approval_percent = args.required_percent
+        documents = fixtures.build_documents(args.requests)
+        requests = env(user=fixtures.requester, su=True)['approval.request'].create_for_documents(
+            flow, documents, module_name='load_harness',
+        )
+
+        if args.scenario == 'committee':
+            # approver-major order: with more threads than requests, several
+            # approvers of the same request are in flight at the same time
+            approvers = requests[0].approver_ids
+            items = [(req.id, user.id) for user in approvers for req in requests]
+        else:
+            items = [(req.id, req.approver_ids[index % len(req.approver_ids)].id)
+                     for index, req in enumerate(requests)]
+    return items
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.serialization_failures = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def add(self, **counters):
+        with self.lock:
+            for key, value in counters.items():
+                if key == 'latency':
+                    self.latencies.append(value)
+                else:
+                    setattr(self, key, getattr(self, key) + value)
+
+
+def worker(registry, items, stats, args, prefix, retry_errors):
+    threading.current_thread().dbname = registry.db_name
+    while True:
+        try:
+            request_id, user_id = items.get_nowait()
+        except queue.Empty:
+            return
+        start = time.perf_counter()
+        for attempt in range(1, args.max_tries + 1):
+            try:
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, user_id, {})
+                    env['approval.request'].browse(request_id).with_context(
+                        action_type='approve',
+                        idempotency_key=f'{prefix}-{request_id}-{user_id}',
+                    ).process_action()
+                break
+            except retry_errors:
+                stats.add(serialization_failures=1)
+                if attempt == args.max_tries:
+                    stats.add(failed=1)
+            except UserError:
+                # e.g. the committee threshold was reached before this vote
+                stats.add(rejected=1)
+                break
+        stats.add(latency=time.perf_counter() - start)
+
+
+def sample_locks(registry, stop, samples, interval):
+    """Count ungranted locks on the database until ``stop`` is set."""
+    with registry.cursor() as cr:
+        while not stop.is_set():
+            cr.execute("""
+                SELECT COUNT(*) FROM pg_locks l
+                  JOIN pg_database d ON d.oid = l.database
+                 WHERE NOT l.granted AND d.datname = current_database()
+            """)
+            samples.append(cr.fetchone()[0])
+            cr.rollback()
+            stop.wait(interval)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    args, odoo_args = parse_args()
+    registry = bootstrap(odoo_args)
+    # importable only once the addons path is configured
+    from odoo.addons.approval_central.utils.concurrency import CONCURRENCY_ERRORS
+    prefix = f'load_{uuid.uuid4().hex[:8]}'
+    items = setup(registry, args, prefix)
+
+    work = queue.Queue()
+    for item in items:
+        work.put(item)
+    stats = Stats()
+    lock_samples = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_locks, args=(registry, stop, lock_samples, args.lock_sample_interval))
+    sampler.start()
+
+    threads = [threading.Thread(target=worker, args=(registry, work, stats, args, prefix, CONCURRENCY_ERRORS)) for __ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+
+    completed = len(stats.latencies) - stats.failed - stats.rejected
+    result = {
+        'scenario': args.scenario,
+        'items': len(items),
+        'completed': completed,
+        'rejected': stats.rejected,
+        'failed': stats.failed,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_per_s': round(completed / elapsed, 2) if elapsed else None,
+        'latency_p50_ms': round(percentile(stats.latencies, 50) * 1000, 2) if stats.latencies else None,
+        'latency_p99_ms': round(percentile(stats.latencies, 99) * 1000, 2) if stats.latencies else None,
+        'serialization_failures': stats.serialization_failures,
+        'lock_wait_samples': sum(1 for waiting in lock_samples if waiting),
+        'lock_wait_max': max(lock_samples, default=0),
+        'lock_samples': len(lock_samples),
+    }
+    for key, value in result.items():
+        print(f"{key:<24} {value}")
+
+    meta = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'database': registry.db_name,
+        'odoo': odoo.release.version,
+        'revision': git_revision(),
+        'prefix': prefix,
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+    }
+    save_results(args.output, meta, [result])
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()